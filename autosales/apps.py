@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AutosalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'autosales'
+
+    def ready(self):
+        from autosales.services.search import create_search_index
+
+        post_migrate.connect(create_search_index, sender=self)
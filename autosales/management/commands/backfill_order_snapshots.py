@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from autosales.models import Order, OrderShop
+from autosales.services.importer import BATCH_SIZE
+from autosales.services.orders import link_shops, recalculate_totals, snapshot_items
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет снимки цен и товаров в позициях оформленных заказов "
+        "и разбивку заказов по магазинам"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--totals",
+            action="store_true",
+            help="Пересчитать суммы заказов по заполненным снимкам",
+        )
+
+    def handle(self, *args, **options):
+        # Lines without a snapshot take the current catalog values, the
+        # closest thing to the checkout price that is still known.
+        order_ids = (
+            Order.objects.exclude(state="basket")
+            .filter(
+                Q(
+                    ordered_items__price__isnull=True,
+                    ordered_items__product_info__isnull=False,
+                )
+                | ~Exists(OrderShop.objects.filter(order_id=OuterRef("id")))
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+            .distinct()
+        )
+        orders = items = links = last_id = 0
+        while batch := list(order_ids.filter(id__gt=last_id)[: options["batch_size"]]):
+            last_id = batch[-1]
+            with transaction.atomic():
+                items += snapshot_items(batch)
+                if options["totals"]:
+                    recalculate_totals(batch)
+                links += link_shops(batch)
+            orders += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Заказов: {orders}, позиций обновлено: {items}, "
+                f"записей по магазинам: {links}"
+            )
+        )
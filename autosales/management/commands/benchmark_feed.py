@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import resource
+import sys
+from tempfile import NamedTemporaryFile
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from ujson import dumps as dump_json
+from yaml import load as load_yaml
+
+from autosales.services import FORMATS, read_feed
+from autosales.services.feeds import CSV, JSONL, YAML, SafeLoader
+from autosales.services.importer import BATCH_SIZE, chunked
+
+PARAMETERS = {"Диагональ (дюйм)": 6.5, "Цвет": "черный", "Встроенная память (Гб)": 64}
+
+
+def _good(index: int) -> dict:
+    return {
+        "id": index,
+        "category": 224 + index % 5,
+        "model": f"model/{index}",
+        "name": f"Товар {index}",
+        "price": 1000 + index % 1000,
+        "price_rrc": 1500 + index % 1000,
+        "quantity": index % 20,
+        "parameters": PARAMETERS,
+    }
+
+
+def _write_feed(file, size: int, feed_format: str) -> None:
+    categories = [{"id": 224 + i, "name": f"Категория {i}"} for i in range(5)]
+    if feed_format == JSONL:
+        file.write(dump_json({"shop": "Benchmark", "categories": categories}) + "\n")
+        for index in range(size):
+            file.write(dump_json(_good(index), ensure_ascii=False) + "\n")
+    elif feed_format == CSV:
+        columns = ["shop", "id", "category", "name", "model", "price"]
+        columns += ["price_rrc", "quantity", *PARAMETERS]
+        file.write(",".join(columns) + "\n")
+        for index in range(size):
+            good = _good(index)
+            row = ["Benchmark", *(good[column] for column in columns[1:8])]
+            file.write(",".join(map(str, row + list(PARAMETERS.values()))) + "\n")
+    else:
+        file.write("shop: Benchmark\ncategories:\n")
+        for category in categories:
+            file.write(f"  - id: {category['id']}\n    name: {category['name']}\n")
+        file.write("goods:\n")
+        for index in range(size):
+            good = _good(index)
+            file.write(
+                f"  - id: {good['id']}\n"
+                f"    category: {good['category']}\n"
+                f"    model: {good['model']}\n"
+                f"    name: {good['name']}\n"
+                f"    price: {good['price']}\n"
+                f"    price_rrc: {good['price_rrc']}\n"
+                f"    quantity: {good['quantity']}\n"
+                f"    parameters:\n"
+            )
+            for name, value in PARAMETERS.items():
+                file.write(f'      "{name}": {value}\n')
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def _measure(path: str, feed_format: str, streaming: bool, queue) -> None:
+    started = perf_counter()
+    rows = 0
+    with open(path, "rb") as stream:
+        if streaming:
+            feed = read_feed(stream, feed_format)
+            for batch in chunked(feed.goods, BATCH_SIZE):
+                rows += len(batch)
+        else:
+            rows = len(load_yaml(stream, Loader=SafeLoader)["goods"])
+    queue.put((rows, perf_counter() - started, _peak_rss_mb()))
+
+
+class Command(BaseCommand):
+    help = "Измеряет пиковое потребление памяти при разборе прайс-листов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[1000, 10000, 100000]
+        )
+        parser.add_argument("--format", choices=FORMATS, default=YAML)
+        parser.add_argument(
+            "--no-baseline",
+            action="store_true",
+            help="Не измерять загрузку всего YAML в память",
+        )
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context("fork")
+        paths = ["streaming"]
+        if options["format"] == YAML and not options["no_baseline"]:
+            paths.append("load_yaml")
+
+        self.stdout.write(
+            f"{'rows':>10} {'size, MB':>10} {'path':>10} "
+            f"{'seconds':>9} {'rows/s':>10} {'peak RSS, MB':>13}"
+        )
+        for size in options["sizes"]:
+            with NamedTemporaryFile(
+                "w", encoding="utf-8", suffix=f".{options['format']}", delete=False
+            ) as file:
+                _write_feed(file, size, options["format"])
+            try:
+                file_size = os.path.getsize(file.name) / 1024 / 1024
+                for path in paths:
+                    queue = context.Queue()
+                    process = context.Process(
+                        target=_measure,
+                        args=(file.name, options["format"], path == "streaming", queue),
+                    )
+                    process.start()
+                    rows, seconds, peak = queue.get()
+                    process.join()
+                    self.stdout.write(
+                        f"{rows:>10} {file_size:>10.1f} {path:>10} "
+                        f"{seconds:>9.2f} {rows / seconds:>10.0f} {peak:>13.1f}"
+                    )
+            finally:
+                os.remove(file.name)
@@ -0,0 +1,30 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from autosales.services.search import fts_available, scan_offer_ids, search_offer_ids
+
+
+class Command(BaseCommand):
+    help = "Сравнивает поиск по индексу FTS5 с перебором через icontains"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="+")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("База данных не поддерживает SQLite FTS5")
+
+        self.stdout.write(f"{'query':<30} {'fts, ms':>10} {'icontains, ms':>14}")
+        for text in options["queries"]:
+            timings = []
+            for search in (search_offer_ids, scan_offer_ids):
+                started = perf_counter()
+                for _ in range(options["repeat"]):
+                    search(text, options["page_size"], 0, None, None)
+                timings.append((perf_counter() - started) / options["repeat"] * 1000)
+            self.stdout.write(
+                f"{text[:30]:<30} {timings[0]:>10.2f} {timings[1]:>14.2f}"
+            )
@@ -0,0 +1,78 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from autosales.models import Order, ProductInfo
+from autosales.serializers import (
+    OrderSerializer,
+    ProductInfoSerializer,
+    serialize_orders,
+    serialize_product_infos,
+)
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость ModelSerializer и быстрой сериализации"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        ids = list(
+            ProductInfo.objects.order_by("id").values_list("id", flat=True)[
+                : options["limit"]
+            ]
+        )
+        orders = Order.objects.filter(
+            id__in=Order.objects.values("id")[: options["limit"]]
+        )
+
+        cases = (
+            (
+                "products",
+                len(ids),
+                lambda: ProductInfoSerializer(
+                    ProductInfo.objects.filter(id__in=ids)
+                    .order_by("id")
+                    .select_related("product")
+                    .prefetch_related(
+                        "product__categories", "product_parameters__parameter"
+                    ),
+                    many=True,
+                ).data,
+                lambda: serialize_product_infos(ids),
+            ),
+            (
+                "orders",
+                orders.count(),
+                lambda: OrderSerializer(
+                    orders.prefetch_related(
+                        "ordered_items__product_info__product__categories",
+                        "ordered_items__product_info__product_parameters__parameter",
+                    ).select_related("contact"),
+                    many=True,
+                ).data,
+                lambda: serialize_orders(orders),
+            ),
+        )
+
+        renderer = JSONRenderer()
+        self.stdout.write(
+            f"{'endpoint':<10} {'rows':>6} {'serializer, rows/s':>19} "
+            f"{'fast, rows/s':>13}"
+        )
+        for name, rows, model_path, fast_path in cases:
+            if renderer.render(model_path()) != renderer.render(fast_path()):
+                raise CommandError(f"Результаты сериализации различаются: {name}")
+            speeds = []
+            for serialize in (model_path, fast_path):
+                started = perf_counter()
+                for _ in range(options["repeat"]):
+                    serialize()
+                seconds = (perf_counter() - started) / options["repeat"]
+                speeds.append(rows / seconds if seconds else 0.0)
+            self.stdout.write(
+                f"{name:<10} {rows:>6} {speeds[0]:>19.0f} {speeds[1]:>13.0f}"
+            )
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from autosales.models import OrderShop
+from autosales.services.export import (
+    CHUNK_SIZE,
+    EXPORT_FORMATS,
+    ExportStats,
+    export_lines,
+    export_rows,
+)
+from autosales.services.orders import OrderFilterError, filter_orders
+
+
+class Command(BaseCommand):
+    help = "Выгружает позиции заказов магазинов в CSV или JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("shop_ids", nargs="*", type=int)
+        parser.add_argument(
+            "--format", dest="export_format", choices=EXPORT_FORMATS, default="csv"
+        )
+        parser.add_argument("--output", help="Файл для выгрузки, по умолчанию stdout")
+        parser.add_argument("--state", default="")
+        parser.add_argument("--date-from", default="")
+        parser.add_argument("--date-to", default="")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        links = OrderShop.objects.all()
+        if options["shop_ids"]:
+            links = links.filter(shop_id__in=options["shop_ids"])
+        try:
+            links = filter_orders(
+                links,
+                {
+                    "state": options["state"],
+                    "date_from": options["date_from"],
+                    "date_to": options["date_to"],
+                },
+            )
+        except OrderFilterError as error:
+            raise CommandError(str(error))
+
+        stats = ExportStats()
+        rows = export_rows(
+            links.order_by("date_time", "id"), options["chunk_size"], stats
+        )
+        output = (
+            open(options["output"], "w", encoding="utf-8", newline="")
+            if options["output"]
+            else self.stdout
+        )
+        try:
+            output.writelines(export_lines(rows, options["export_format"]))
+        finally:
+            if output is not self.stdout:
+                output.close()
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Заказов: {stats.orders}, строк: {stats.lines}, "
+                f"{stats.seconds:.2f} с, {stats.lines_per_second:.0f} строк/с"
+            )
+        )
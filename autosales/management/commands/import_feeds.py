@@ -0,0 +1,134 @@
+import csv
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter, sleep
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+
+from autosales.models import User
+from autosales.services import (
+    FORMATS,
+    MODES,
+    SYNC,
+    run_job,
+    start_job,
+)
+
+CLAIM_INTERVAL = 1.0
+
+
+def _import_entry(user_id: int, source: str, feed_format: str, mode: str) -> dict:
+    # The entry runs as an import job, claimed like the ones of
+    # run_import_jobs: it waits while a queued import of the same partner
+    # is running, and sync feeds are committed batch by batch.
+    started = perf_counter()
+    job = start_job(user_id, source, mode, feed_format)
+    while job is None:
+        sleep(CLAIM_INTERVAL)
+        job = start_job(user_id, source, mode, feed_format)
+    job = run_job(job)
+    result = {
+        "user": user_id,
+        "source": source,
+        "shop": job.shop.name if job.shop else "",
+        "error": job.errors,
+        "rows": job.processed if job.state == "done" else 0,
+        "queries": job.stats.get("queries", 0) if job.state == "done" else 0,
+    }
+    result["seconds"] = perf_counter() - started
+    return result
+
+
+def _import_user_feeds(user_id: int, entries: list[tuple]) -> list[dict]:
+    # Feeds of one partner are imported one after another, so writes into the
+    # same shop never overlap.
+    return [_import_entry(user_id, *entry) for entry in entries]
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует прайс-листы нескольких магазинов параллельно. "
+        "Манифест - CSV с колонками user (id или email), feed (URL или путь), "
+        "необязательными format и mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("manifest")
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+        parser.add_argument("--mode", choices=MODES, default=SYNC)
+
+    def handle(self, *args, **options):
+        entries = self._read_manifest(options["manifest"], options["mode"])
+        started = perf_counter()
+        results = []
+        if options["workers"] <= 1:
+            for user_id, user_entries in entries.items():
+                results += _import_user_feeds(user_id, user_entries)
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                futures = [
+                    pool.submit(_import_user_feeds, user_id, user_entries)
+                    for user_id, user_entries in entries.items()
+                ]
+                for future in as_completed(futures):
+                    results += future.result()
+        self._report(results, perf_counter() - started)
+
+    def _read_manifest(self, path: str, default_mode: str) -> dict[int, list]:
+        with open(path, encoding="utf-8", newline="") as file:
+            rows = list(csv.DictReader(file))
+        if not rows or not {"user", "feed"}.issubset(rows[0]):
+            raise CommandError("Манифест должен содержать колонки user и feed")
+
+        keys = {row["user"].strip() for row in rows}
+        ids = {key for key in keys if key.isdigit()}
+        users = {}
+        for user_id, email in User.objects.filter(
+            Q(id__in=ids) | Q(email__in=keys - ids)
+        ).values_list("id", "email"):
+            users[str(user_id)] = users[email] = user_id
+
+        entries = defaultdict(list)
+        for row in rows:
+            key = row["user"].strip()
+            if key not in users:
+                raise CommandError(f"Пользователь {key} не найден")
+            feed_format = (row.get("format") or "").strip()
+            mode = (row.get("mode") or "").strip() or default_mode
+            if (feed_format and feed_format not in FORMATS) or mode not in MODES:
+                raise CommandError(f"Неверная строка манифеста: {row}")
+            entries[users[key]].append((row["feed"].strip(), feed_format, mode))
+        return entries
+
+    def _report(self, results: list[dict], seconds: float) -> None:
+        self.stdout.write(
+            f"{'shop':<30} {'rows':>9} {'seconds':>9} {'rows/s':>9} "
+            f"{'queries':>8}  source"
+        )
+        for result in sorted(results, key=lambda result: -result["seconds"]):
+            rate = result["rows"] / result["seconds"] if result["seconds"] else 0
+            line = (
+                f"{result['shop'][:30]:<30} {result['rows']:>9} "
+                f"{result['seconds']:>9.2f} {rate:>9.0f} {result['queries']:>8}  "
+                f"{result['source']}"
+            )
+            if result["error"]:
+                self.stdout.write(self.style.ERROR(f"{line}: {result['error']}"))
+            else:
+                self.stdout.write(line)
+
+        rows = sum(result["rows"] for result in results)
+        failed = sum(1 for result in results if result["error"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Feeds: {len(results)}, failed: {failed}, rows: {rows}, "
+                f"seconds: {seconds:.2f}, rows/s: {rows / seconds if seconds else 0:.0f}"
+            )
+        )
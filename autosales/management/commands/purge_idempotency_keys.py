@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from autosales.services.idempotency import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Удаляет ключи идемпотентности с истекшим сроком хранения"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        purged = purge_idempotency_keys(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено ключей: {purged}"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from autosales.models import CatalogEntry, ProductInfo, Shop
+from autosales.services.catalog import BATCH_SIZE, refresh_entries
+from autosales.services.importer import chunked
+from autosales.services.versions import bump_shops
+
+
+class Command(BaseCommand):
+    help = "Перестраивает витрину каталога"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        CatalogEntry.objects.exclude(
+            offer_id__in=ProductInfo.objects.filter(active=True).values("id")
+        ).delete()
+        refreshed = 0
+        ids = (
+            ProductInfo.objects.filter(active=True)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        for batch in chunked(ids.iterator(), options["batch_size"]):
+            refreshed += refresh_entries(batch, options["batch_size"])
+        bump_shops(*Shop.objects.values_list("id", flat=True))
+        self.stdout.write(self.style.SUCCESS(f"Обновлено записей: {refreshed}"))
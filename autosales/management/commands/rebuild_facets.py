@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from autosales.models import Shop
+from autosales.services import bump_shops, rebuild_facets
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает фасеты параметров товаров"
+
+    def add_arguments(self, parser):
+        parser.add_argument("shop_ids", nargs="*", type=int)
+
+    def handle(self, *args, **options):
+        shop_ids = options["shop_ids"] or list(
+            Shop.objects.values_list("id", flat=True)
+        )
+        facets = 0
+        for shop_id in shop_ids:
+            facets += rebuild_facets(shop_id)
+        if shop_ids:
+            bump_shops(*shop_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Магазинов: {len(shop_ids)}, значений фасетов: {facets}"
+            )
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import TruncDate
+
+from autosales.models import OrderShop, SalesRollup, Shop
+from autosales.services.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводку продаж магазинов по дням и категориям"
+
+    def add_arguments(self, parser):
+        parser.add_argument("shop_ids", nargs="*", type=int)
+        parser.add_argument(
+            "--batch-days", type=int, default=31, help="Дней в одном пересчете"
+        )
+
+    def handle(self, *args, **options):
+        shop_ids = options["shop_ids"] or list(
+            Shop.objects.values_list("id", flat=True)
+        )
+        size = options["batch_days"]
+        days_total = rows = 0
+        for shop_id in shop_ids:
+            days = sorted(
+                OrderShop.objects.filter(shop_id=shop_id)
+                .annotate(day=TruncDate("date_time"))
+                .values_list("day", flat=True)
+                .distinct()
+            )
+            for start in range(0, len(days), size):
+                rows += rebuild_rollups(shop_id, days[start : start + size])
+            SalesRollup.objects.filter(shop_id=shop_id).exclude(day__in=days).delete()
+            days_total += len(days)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Магазинов: {len(shop_ids)}, дней: {days_total}, строк сводки: {rows}"
+            )
+        )
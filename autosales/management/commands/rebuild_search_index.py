@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from autosales.models import ProductInfo
+from autosales.services.importer import BATCH_SIZE, chunked
+from autosales.services.search import (
+    TABLE,
+    create_search_index,
+    fts_available,
+    index_offers,
+)
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс каталога"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("База данных не поддерживает SQLite FTS5")
+        create_search_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+
+        indexed = 0
+        ids = (
+            ProductInfo.objects.filter(active=True)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        for batch in chunked(ids.iterator(), options["batch_size"]):
+            index_offers(batch)
+            indexed += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f"Проиндексировано предложений: {indexed}")
+        )
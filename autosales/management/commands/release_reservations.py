@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from autosales.services.transitions import release_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Отменяет заказы, не подтвержденные магазином до истечения резерва, "
+        "и возвращает товар на склад"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        orders = units = 0
+        while True:
+            released, released_units = release_expired(options["batch_size"])
+            orders += released
+            units += released_units
+            if released < options["batch_size"]:
+                break
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Отменено заказов: {orders}, возвращено единиц: {units}"
+            )
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from autosales.models import Order
+from autosales.services.importer import BATCH_SIZE
+from autosales.services.orders import recalculate_totals
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сохраненные суммы и количество товаров в заказах"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересчитать и оформленные заказы, а не только корзины",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        orders = Order.objects.order_by("id")
+        if not options["all"]:
+            orders = orders.filter(state="basket")
+        order_ids = orders.values_list("id", flat=True)
+        repaired = last_id = 0
+        while batch := list(order_ids.filter(id__gt=last_id)[: options["batch_size"]]):
+            last_id = batch[-1]
+            with transaction.atomic():
+                repaired += recalculate_totals(batch)
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано заказов: {repaired}"))
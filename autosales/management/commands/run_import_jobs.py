@@ -0,0 +1,65 @@
+import logging
+import multiprocessing
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from autosales.services import claim_job, run_job
+
+logger = logging.getLogger(__name__)
+
+
+def _work(once: bool, interval: float) -> None:
+    while True:
+        try:
+            job = claim_job()
+            if job is not None:
+                run_job(job)
+                continue
+            if once:
+                return
+        except DatabaseError:
+            # SQLite answers a busy queue with "database is locked". A claimed
+            # job keeps its heartbeat and is claimed again once it goes stale.
+            logger.exception("Import worker failed to reach the job queue")
+            connections.close_all()
+        sleep(interval)
+
+
+class Command(BaseCommand):
+    help = "Выполняет задачи импорта прайс-листов из очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Завершить работу, когда очередь опустеет",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Пауза между опросами пустой очереди, секунд",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] <= 1:
+            _work(options["once"], options["interval"])
+            return
+
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_work, args=(options["once"], options["interval"]))
+            for _ in range(options["concurrency"])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
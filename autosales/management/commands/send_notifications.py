@@ -0,0 +1,40 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from autosales.services.notifications import BATCH_SIZE, send_notifications
+
+
+class Command(BaseCommand):
+    help = "Отправляет накопленные уведомления покупателям"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Завершить работу, когда очередь опустеет",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Пауза между опросами пустой очереди, секунд",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_notifications(options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if options["once"]:
+                break
+            sleep(options["interval"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Отправлено уведомлений: {total_sent}, ошибок: {total_failed}"
+            )
+        )
@@ -0,0 +1,157 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+
+from autosales.models import (
+    Contact,
+    Order,
+    OrderItem,
+    Product,
+    ProductInfo,
+    Shop,
+    StockReservation,
+    User,
+)
+from autosales.services.orders import checkout_order
+from autosales.services.stock import StockShortage
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест оформления заказов: параллельные покупатели "
+        "разбирают ограниченный остаток, проверяется отсутствие перепродажи"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--stock", type=int, default=100)
+        parser.add_argument("--offers", type=int, default=4)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Works on throwaway users, shops and offers that are deleted at the
+        # end, so it can be pointed at a development database.
+        tag = uuid4().hex[:8]
+        rnd = random.Random(options["seed"])
+        shops, buyers, product = self._create_fixtures(tag, options, rnd)
+        try:
+            offers = list(
+                ProductInfo.objects.filter(shop__in=shops).values_list("id", flat=True)
+            )
+            initial = self._stock(offers)
+            baskets = list(
+                Order.objects.filter(user__in=buyers).values_list(
+                    "user_id", "id", "contact_id"
+                )
+            )
+
+            started = perf_counter()
+            with ThreadPoolExecutor(options["threads"]) as executor:
+                results = list(executor.map(self._checkout, baskets))
+            seconds = perf_counter() - started
+
+            placed = [order_id for order_id, ok in results if ok]
+            sold = (
+                OrderItem.objects.filter(order_id__in=placed).aggregate(
+                    total=Sum("quantity")
+                )["total"]
+                or 0
+            )
+            reserved = (
+                StockReservation.objects.filter(order_id__in=placed).aggregate(
+                    total=Sum("quantity")
+                )["total"]
+                or 0
+            )
+            left = self._stock(offers)
+            negative = ProductInfo.objects.filter(id__in=offers, quantity__lt=0)
+
+            self.stdout.write(
+                f"Оформлено: {len(placed)}, отказов: {len(results) - len(placed)}, "
+                f"продано единиц: {sold} из {initial}, осталось: {left}"
+            )
+            self.stdout.write(
+                f"{len(results) / seconds:.1f} оформлений/с, "
+                f"{seconds:.2f} с на {len(results)} попыток"
+            )
+            if initial - left != sold or reserved != sold or negative.exists():
+                raise CommandError("Остатки не сходятся: обнаружена перепродажа")
+            self.stdout.write(self.style.SUCCESS("Перепродаж нет"))
+        finally:
+            User.objects.filter(id__in=[buyer.id for buyer in buyers]).delete()
+            User.objects.filter(email=f"stress-{tag}-shop@example.com").delete()
+            product.delete()
+
+    def _create_fixtures(self, tag, options, rnd):
+        owner = User.objects.create(
+            email=f"stress-{tag}-shop@example.com",
+            username=f"stress-{tag}-shop",
+            type="shop",
+        )
+        shops = [
+            Shop.objects.create(name=f"stress-{tag}-{index}", user=owner, state=True)
+            for index in range(2)
+        ]
+        product = Product.objects.create(name=f"stress-{tag}")
+        offers = ProductInfo.objects.bulk_create(
+            [
+                ProductInfo(
+                    product=product,
+                    shop=shops[index % len(shops)],
+                    external_id=index + 1,
+                    quantity=options["stock"],
+                    price=100,
+                    price_rrc=100,
+                )
+                for index in range(options["offers"])
+            ]
+        )
+        if not all(offer.id for offer in offers):
+            offers = list(ProductInfo.objects.filter(product=product))
+
+        buyers = []
+        for index in range(options["buyers"]):
+            buyer = User.objects.create(
+                email=f"stress-{tag}-{index}@example.com",
+                username=f"stress-{tag}-{index}",
+                type="buyer",
+            )
+            contact = Contact.objects.create(
+                user=buyer, city="Москва", street="Тверская", phone="+79990000000"
+            )
+            basket = Order.objects.create(user=buyer, state="basket", contact=contact)
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(
+                        order=basket, product_info=offer, quantity=rnd.randint(1, 3)
+                    )
+                    for offer in rnd.sample(offers, rnd.randint(1, len(offers)))
+                ]
+            )
+            buyers.append(buyer)
+        return shops, buyers, product
+
+    @staticmethod
+    def _checkout(basket) -> tuple[int, bool]:
+        user_id, order_id, contact_id = basket
+        try:
+            return order_id, checkout_order(user_id, order_id, contact_id)
+        except StockShortage:
+            return order_id, False
+        finally:
+            connections.close_all()
+
+    @staticmethod
+    def _stock(offers) -> int:
+        return (
+            ProductInfo.objects.filter(id__in=offers).aggregate(total=Sum("quantity"))[
+                "total"
+            ]
+            or 0
+        )
@@ -8,12 +8,28 @@ __all__ = (
     "ProductParameter",
     "Parameter",
     "ProductInfo",
+    "ProductFacet",
     "Order",
     "OrderItem",
+    "OrderShop",
     "ConfirmEmailToken",
+    "ImportJob",
+    "CatalogVersion",
+    "CatalogEntry",
+    "StockReservation",
+    "IdempotencyKey",
+    "SalesRollup",
+    "Notification",
 )
 from .user import User, UserManager, Contact
 from .shop import Shop, Category
-from .product import Product, ProductParameter, Parameter, ProductInfo
-from .order import Order, OrderItem
+from .product import Product, ProductParameter, Parameter, ProductInfo, ProductFacet
+from .order import Order, OrderItem, OrderShop
 from .auth_token import ConfirmEmailToken
+from .import_job import ImportJob
+from .version import CatalogVersion
+from .catalog import CatalogEntry
+from .reservation import StockReservation
+from .idempotency import IdempotencyKey
+from .sales import SalesRollup
+from .notification import Notification
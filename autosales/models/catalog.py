@@ -0,0 +1,41 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+from .product import Product, ProductInfo
+from .shop import Shop
+
+
+class CatalogEntry(models.Model):
+    objects = models.manager.Manager()
+    offer = models.OneToOneField(
+        ProductInfo,
+        verbose_name=_("Product`s information"),
+        related_name="catalog_entry",
+        primary_key=True,
+        on_delete=models.CASCADE,
+    )
+    shop = models.ForeignKey(
+        Shop,
+        verbose_name=_("Shop"),
+        related_name="catalog_entries",
+        on_delete=models.CASCADE,
+    )
+    product = models.ForeignKey(
+        Product,
+        verbose_name=_("Product"),
+        related_name="catalog_entries",
+        on_delete=models.CASCADE,
+    )
+    active = models.BooleanField(verbose_name=_("Active"), default=True)
+    payload = models.JSONField(verbose_name=_("Payload"))
+
+    class Meta:
+        verbose_name = "Запись каталога"
+        verbose_name_plural = "Витрина каталога"
+        indexes = [
+            models.Index(fields=["active", "offer"], name="catalog_entry_active"),
+            models.Index(fields=["shop", "active", "offer"], name="catalog_entry_shop"),
+        ]
+
+    def __str__(self) -> str:
+        return str(self.offer_id)
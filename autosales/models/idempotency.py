@@ -0,0 +1,40 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+from .user import User
+
+
+class IdempotencyKey(models.Model):
+    objects = models.manager.Manager()
+    user = models.ForeignKey(
+        User,
+        verbose_name=_("User"),
+        related_name="idempotency_keys",
+        on_delete=models.CASCADE,
+    )
+    key = models.CharField(verbose_name=_("Key"), max_length=255)
+    fingerprint = models.CharField(verbose_name=_("Fingerprint"), max_length=64)
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name=_("Status code"), null=True, blank=True
+    )
+    response = models.JSONField(verbose_name=_("Response"), null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_until = models.DateTimeField(
+        verbose_name=_("Locked until"), null=True, blank=True
+    )
+    expires_at = models.DateTimeField(verbose_name=_("Expires at"))
+
+    class Meta:
+        verbose_name = "Ключ идемпотентности"
+        verbose_name_plural = "Список ключей идемпотентности"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="idempotency_key_expires_at"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id}: {self.key}"
@@ -0,0 +1,72 @@
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+from .user import User
+from .shop import Shop
+
+JOB_STATE_CHOICES = (
+    ("queued", "В очереди"),
+    ("running", "Выполняется"),
+    ("done", "Завершен"),
+    ("failed", "Ошибка"),
+    ("partial", "Применена частично"),
+)
+
+
+class ImportJob(models.Model):
+    objects = models.manager.Manager()
+    user = models.ForeignKey(
+        User,
+        verbose_name=_("User"),
+        related_name="import_jobs",
+        on_delete=models.CASCADE,
+    )
+    shop = models.ForeignKey(
+        Shop,
+        verbose_name=_("Shop"),
+        related_name="import_jobs",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    url = models.URLField(verbose_name=_("Link"), max_length=2048)
+    feed_format = models.CharField(
+        verbose_name=_("Feed format"), max_length=5, blank=True
+    )
+    mode = models.CharField(verbose_name=_("Import mode"), max_length=10)
+    state = models.CharField(
+        verbose_name=_("State"),
+        choices=JOB_STATE_CHOICES,
+        max_length=10,
+        default="queued",
+    )
+    skipped = models.BooleanField(verbose_name=_("Skipped"), default=False)
+    processed = models.PositiveIntegerField(verbose_name=_("Processed"), default=0)
+    total = models.PositiveIntegerField(verbose_name=_("Total"), null=True, blank=True)
+    stats = models.JSONField(verbose_name=_("Stats"), default=dict, blank=True)
+    errors = models.TextField(verbose_name=_("Errors"), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Задача импорта"
+        verbose_name_plural = "Список задач импорта"
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["state", "created_at"], name="import_job_state"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user}: {self.url} ({self.state})"
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or timezone.now()) - self.started_at
+        if not elapsed.total_seconds():
+            return 0.0
+        return round(self.processed / elapsed.total_seconds(), 1)
@@ -0,0 +1,25 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+
+class Notification(models.Model):
+    # Outbox of e-mails to customers: rows are written in the request and
+    # sent later by the send_notifications command.
+    objects = models.manager.Manager()
+    email = models.EmailField(verbose_name=_("Email"), max_length=254)
+    subject = models.CharField(verbose_name=_("Subject"), max_length=255)
+    body = models.TextField(verbose_name=_("Body"))
+    attempts = models.PositiveSmallIntegerField(verbose_name=_("Attempts"), default=0)
+    error = models.TextField(verbose_name=_("Errors"), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Уведомление"
+        verbose_name_plural = "Очередь уведомлений"
+        indexes = [
+            models.Index(fields=["sent_at", "id"], name="notification_outbox"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.email}: {self.subject}"
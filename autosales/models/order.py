@@ -3,6 +3,7 @@ from django.db import models
 
 from .user import User, Contact
 from .product import ProductInfo
+from .shop import Shop
 
 STATE_CHOICES = (
     ("basket", "Статус корзины"),
@@ -33,15 +34,22 @@ class Order(models.Model):
     contact = models.ForeignKey(
         Contact,
         verbose_name=_("Contact"),
-        blank=False,
-        null=False,
+        blank=True,
+        null=True,
         on_delete=models.CASCADE,
     )
+    total_sum = models.PositiveBigIntegerField(verbose_name=_("Total sum"), default=0)
+    items_count = models.PositiveIntegerField(verbose_name=_("Items count"), default=0)
 
     class Meta:
         verbose_name = "Заказ"
         verbose_name_plural = "Список заказ"
         ordering = ("-date_time",)
+        indexes = [
+            models.Index(
+                fields=["user", "state", "date_time"], name="order_user_state_date"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user}: {self.date_time}"
@@ -61,9 +69,24 @@ class OrderItem(models.Model):
         verbose_name=_("Product`s information"),
         related_name="ordered_items",
         blank=True,
-        on_delete=models.CASCADE,
+        null=True,
+        on_delete=models.SET_NULL,
     )
     quantity = models.PositiveIntegerField(verbose_name=_("Quantity"))
+    # Filled in at checkout, so order history survives catalog updates.
+    product_name = models.CharField(
+        verbose_name=_("Product name"), max_length=80, blank=True
+    )
+    model = models.CharField(verbose_name=_("Model"), max_length=80, blank=True)
+    shop = models.ForeignKey(
+        Shop,
+        verbose_name=_("Shop"),
+        related_name="ordered_items",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    price = models.PositiveIntegerField(verbose_name=_("Price"), blank=True, null=True)
 
     class Meta:
         verbose_name = "Заказанная позиция"
@@ -73,3 +96,44 @@ class OrderItem(models.Model):
                 fields=["order_id", "product_info"], name="unique_order_item"
             ),
         ]
+
+
+class OrderShop(models.Model):
+    # One row per shop taking part in an order, written at checkout. State and
+    # date are copied from the order so partner listings never join it.
+    objects = models.manager.Manager()
+    order = models.ForeignKey(
+        Order,
+        verbose_name=_("Order"),
+        related_name="shop_orders",
+        on_delete=models.CASCADE,
+    )
+    shop = models.ForeignKey(
+        Shop,
+        verbose_name=_("Shop"),
+        related_name="shop_orders",
+        on_delete=models.CASCADE,
+    )
+    state = models.CharField(
+        verbose_name=_("State"),
+        choices=STATE_CHOICES,
+        max_length=15,
+    )
+    date_time = models.DateTimeField()
+    total_sum = models.PositiveBigIntegerField(verbose_name=_("Total sum"), default=0)
+    items_count = models.PositiveIntegerField(verbose_name=_("Items count"), default=0)
+
+    class Meta:
+        verbose_name = "Заказ магазина"
+        verbose_name_plural = "Список заказов магазинов"
+        constraints = [
+            models.UniqueConstraint(fields=["order", "shop"], name="unique_order_shop"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["shop", "state", "date_time"], name="order_shop_state_date"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.shop_id}: {self.order_id}"
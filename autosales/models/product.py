@@ -44,6 +44,9 @@ class ProductInfo(models.Model):
     quantity = models.PositiveIntegerField(verbose_name=_("Quantity"))
     price = models.PositiveIntegerField(verbose_name=_("Price"))
     price_rrc = models.PositiveIntegerField(verbose_name=_("Recommended retail price"))
+    # Offers dropped from the feed are retired rather than deleted, so order
+    # lines keep pointing at them; a later feed can bring them back.
+    active = models.BooleanField(verbose_name=_("Active"), default=True)
 
     class Meta:
         verbose_name = "Информация о продукте"
@@ -53,6 +56,13 @@ class ProductInfo(models.Model):
                 fields=["product", "shop", "external_id"], name="unique_product_info"
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["shop", "external_id"], name="product_info_shop_external"
+            ),
+            models.Index(fields=["shop", "id"], name="product_info_shop_id"),
+            models.Index(fields=["product", "id"], name="product_info_product_id"),
+        ]
 
     def __str__(self) -> str:
         return self.model
@@ -97,3 +107,42 @@ class ProductParameter(models.Model):
                 fields=["product_info", "parameter"], name="unique_product_parameter"
             ),
         ]
+        indexes = [
+            models.Index(fields=["parameter", "value"], name="product_parameter_value"),
+        ]
+
+
+class ProductFacet(models.Model):
+    objects = models.manager.Manager()
+    shop = models.ForeignKey(
+        Shop,
+        verbose_name=_("Shop"),
+        related_name="facets",
+        on_delete=models.CASCADE,
+    )
+    category = models.ForeignKey(
+        Category,
+        verbose_name=_("Category"),
+        related_name="facets",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+    )
+    parameter = models.ForeignKey(
+        Parameter,
+        verbose_name=_("Parameter"),
+        related_name="facets",
+        on_delete=models.CASCADE,
+    )
+    value = models.CharField(verbose_name=_("Value"), max_length=100)
+    count = models.PositiveIntegerField(verbose_name=_("Count"))
+
+    class Meta:
+        verbose_name = "Фасет"
+        verbose_name_plural = "Список фасетов"
+        indexes = [
+            models.Index(fields=["category", "shop"], name="product_facet_category"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.parameter}: {self.value} ({self.count})"
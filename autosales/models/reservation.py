@@ -0,0 +1,35 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+from .order import Order
+from .product import ProductInfo
+
+
+class StockReservation(models.Model):
+    objects = models.manager.Manager()
+    order = models.ForeignKey(
+        Order,
+        verbose_name=_("Order"),
+        related_name="reservations",
+        on_delete=models.CASCADE,
+    )
+    product_info = models.ForeignKey(
+        ProductInfo,
+        verbose_name=_("Product`s information"),
+        related_name="reservations",
+        on_delete=models.CASCADE,
+    )
+    quantity = models.PositiveIntegerField(verbose_name=_("Quantity"))
+    expires_at = models.DateTimeField(
+        verbose_name=_("Expires at"), null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = "Резерв товара"
+        verbose_name_plural = "Список резервов товаров"
+        indexes = [
+            models.Index(fields=["expires_at"], name="reservation_expires_at"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.order_id}: {self.product_info_id} x {self.quantity}"
@@ -0,0 +1,51 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+from django.db.models.functions import Coalesce
+
+from .shop import Shop, Category
+
+
+class SalesRollup(models.Model):
+    # Sales of a shop per day and category. A product in several categories
+    # counts in each of them, so category rows do not add up to the day: the
+    # row with an empty category holds the shop's totals for the day, every
+    # line counted once, uncategorized products included.
+    objects = models.manager.Manager()
+    shop = models.ForeignKey(
+        Shop,
+        verbose_name=_("Shop"),
+        related_name="sales_rollups",
+        on_delete=models.CASCADE,
+    )
+    day = models.DateField(verbose_name=_("Day"))
+    category = models.ForeignKey(
+        Category,
+        verbose_name=_("Category"),
+        related_name="sales_rollups",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+    )
+    units = models.PositiveBigIntegerField(verbose_name=_("Units"), default=0)
+    revenue = models.PositiveBigIntegerField(verbose_name=_("Revenue"), default=0)
+    orders = models.PositiveIntegerField(verbose_name=_("Orders"), default=0)
+
+    class Meta:
+        verbose_name = "Продажи за день"
+        verbose_name_plural = "Сводка продаж"
+        constraints = [
+            # Empty categories compare equal here, so there is one totals row
+            # per shop and day.
+            models.UniqueConstraint(
+                "shop",
+                "day",
+                Coalesce("category", 0),
+                name="unique_sales_rollup",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["shop", "day", "category"], name="sales_rollup_day"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.shop_id}: {self.day} {self.category_id}"
@@ -17,6 +17,22 @@ class Shop(models.Model):
         null=True,
     )
     state = models.BooleanField(verbose_name=_("Order receipt status"), default=True)
+    feed_url = models.URLField(verbose_name=_("Feed link"), max_length=2048, blank=True)
+    feed_etag = models.CharField(
+        verbose_name=_("Feed ETag"), max_length=255, blank=True
+    )
+    feed_last_modified = models.CharField(
+        verbose_name=_("Feed Last-Modified"), max_length=64, blank=True
+    )
+    feed_sha256 = models.CharField(
+        verbose_name=_("Feed SHA-256"), max_length=64, blank=True
+    )
+    feed_fetches = models.PositiveIntegerField(
+        verbose_name=_("Feed fetches"), default=0
+    )
+    feed_skips = models.PositiveIntegerField(
+        verbose_name=_("Skipped feed imports"), default=0
+    )
 
     class Meta:
         verbose_name = "Магазин"
@@ -26,6 +42,12 @@ class Shop(models.Model):
     def __str__(self) -> str:
         return f"{self.name}: {self.url}"
 
+    @property
+    def feed_skip_ratio(self) -> float:
+        if not self.feed_fetches:
+            return 0.0
+        return round(self.feed_skips / self.feed_fetches, 3)
+
 
 class Category(models.Model):
     objects = models.manager.Manager()
@@ -0,0 +1,15 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+
+class CatalogVersion(models.Model):
+    objects = models.manager.Manager()
+    key = models.CharField(verbose_name=_("Key"), max_length=50, unique=True)
+    value = models.PositiveBigIntegerField(verbose_name=_("Version"), default=0)
+
+    class Meta:
+        verbose_name = "Версия каталога"
+        verbose_name_plural = "Список версий каталога"
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.value}"
@@ -0,0 +1,77 @@
+from django.conf import settings
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ProductCursorPagination(CursorPagination):
+    ordering = "id"
+    page_size = settings.CATALOG_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.CATALOG_MAX_PAGE_SIZE
+
+
+class CatalogCursorPagination(ProductCursorPagination):
+    # Catalog entries share their primary key with the offer, so cursors stay
+    # interchangeable with ProductCursorPagination.
+    ordering = "offer_id"
+
+
+class OrderCursorPagination(CursorPagination):
+    ordering = ("-date_time", "-id")
+    page_size = settings.ORDER_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.ORDER_MAX_PAGE_SIZE
+
+
+class SearchPagination(BasePagination):
+    page_query_param = "page"
+    page_size = settings.CATALOG_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.CATALOG_MAX_PAGE_SIZE
+
+    def paginate_ids(self, request, fetch_ids) -> list[int]:
+        self.request = request
+        self.page = self._positive_int(
+            request.query_params.get(self.page_query_param), 1
+        )
+        size = min(
+            self._positive_int(
+                request.query_params.get(self.page_size_query_param), self.page_size
+            ),
+            self.max_page_size,
+        )
+        ids = fetch_ids(size + 1, (self.page - 1) * size)
+        self.has_next = len(ids) > size
+        return ids[:size]
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page + 1)
+
+    def get_previous_link(self):
+        if self.page == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page - 1)
+
+    @staticmethod
+    def _positive_int(value, default: int) -> int:
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return default
+        return value if value > 0 else default
@@ -8,6 +8,18 @@ __all_ = (
     "ProductParameterSerializer",
     "OrderSerializer",
     "OrderItemSerializer",
+    "OrderHistorySerializer",
+    "OrderedItemSerializer",
+    "ShopOrderSerializer",
+    "ImportJobSerializer",
+    "ORDER_FIELDS",
+    "SHOP_ORDER_FIELDS",
+    "serialize_product_infos",
+    "serialize_orders",
+    "serialize_order_rows",
+    "iter_orders",
+    "serialize_shop_order_rows",
+    "iter_shop_orders",
 )
 
 from .user import UserSerializer, ContactSerializer
@@ -17,4 +29,21 @@ from .product import (
     ProductSerializer,
     ProductParameterSerializer,
 )
-from .order import OrderSerializer, OrderItemSerializer
+from .order import (
+    OrderSerializer,
+    OrderItemSerializer,
+    OrderHistorySerializer,
+    OrderedItemSerializer,
+    ShopOrderSerializer,
+)
+from .import_job import ImportJobSerializer
+from .fast import (
+    ORDER_FIELDS,
+    SHOP_ORDER_FIELDS,
+    serialize_product_infos,
+    serialize_orders,
+    serialize_order_rows,
+    iter_orders,
+    serialize_shop_order_rows,
+    iter_shop_orders,
+)
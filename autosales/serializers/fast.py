@@ -0,0 +1,272 @@
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.db.models import QuerySet
+from rest_framework.fields import DateTimeField
+
+from autosales.models import (
+    Category,
+    Contact,
+    OrderItem,
+    Parameter,
+    ProductInfo,
+    ProductParameter,
+)
+
+# Read-only counterparts of ProductInfoSerializer and OrderSerializer built on
+# values() projections. Every query mirrors the prefetch the serializers rely
+# on, so nested lists come back in the same order and the rendered JSON is
+# byte-identical.
+
+PRODUCT_INFO_FIELDS = (
+    "id",
+    "external_id",
+    "model",
+    "product_id",
+    "product__name",
+    "shop_id",
+    "quantity",
+    "price",
+    "price_rrc",
+)
+ORDER_FIELDS = (
+    "id",
+    "user_id",
+    "state",
+    "date_time",
+    "total_sum",
+    "items_count",
+    "contact_id",
+)
+ORDERED_ITEM_FIELDS = (
+    "order_id",
+    "id",
+    "product_info_id",
+    "product_name",
+    "model",
+    "shop_id",
+    "price",
+    "quantity",
+)
+SHOP_ORDER_FIELDS = (
+    "id",
+    "order_id",
+    "order__user_id",
+    "shop_id",
+    "state",
+    "date_time",
+    "total_sum",
+    "items_count",
+    "order__contact_id",
+)
+CONTACT_FIELDS = (
+    "id",
+    "city",
+    "street",
+    "house",
+    "structure",
+    "building",
+    "apartment",
+    "phone",
+)
+
+CHUNK_SIZE = 500
+
+date_time_field = DateTimeField()
+
+
+def _string(value) -> str | None:
+    return None if value is None else str(value)
+
+
+def product_info_rows(ids: Iterable[int]) -> dict[int, dict]:
+    ids = list(ids)
+    if not ids:
+        return {}
+    infos = list(
+        ProductInfo.objects.filter(id__in=ids).values_list(*PRODUCT_INFO_FIELDS)
+    )
+
+    categories, names = {}, {}
+    for product_id, category_id, name in Category.objects.filter(
+        categories__in={info[3] for info in infos}
+    ).values_list("categories", "id", "name"):
+        if category_id not in names:
+            names[category_id] = str(Category(id=category_id, name=name))
+        categories.setdefault(product_id, []).append(names[category_id])
+
+    rows = list(
+        ProductParameter.objects.filter(
+            product_info_id__in=[info[0] for info in infos]
+        ).values_list("product_info_id", "parameter_id", "value")
+    )
+    parameter_names = dict(
+        Parameter.objects.filter(id__in={row[1] for row in rows}).values_list(
+            "id", "name"
+        )
+    )
+    parameters = {}
+    for info_id, parameter_id, value in rows:
+        parameters.setdefault(info_id, []).append(
+            {"parameter": str(parameter_names[parameter_id]), "value": value}
+        )
+
+    return {
+        info_id: {
+            "id": info_id,
+            "external_id": external_id,
+            "model": model,
+            "product": {
+                "name": product_name,
+                "categories": list(categories.get(product_id, ())),
+            },
+            "shop": shop_id,
+            "quantity": quantity,
+            "price": price,
+            "price_rrc": price_rrc,
+            "product_parameters": parameters.get(info_id, []),
+        }
+        for (
+            info_id,
+            external_id,
+            model,
+            product_id,
+            product_name,
+            shop_id,
+            quantity,
+            price,
+            price_rrc,
+        ) in infos
+    }
+
+
+def serialize_product_infos(ids: Iterable[int]) -> list[dict]:
+    ids = list(ids)
+    rows = product_info_rows(ids)
+    return [rows[info_id] for info_id in ids if info_id in rows]
+
+
+def serialize_orders(orders: QuerySet, history: bool = False) -> list[dict]:
+    return _order_rows(list(orders.values(*ORDER_FIELDS)), history)
+
+
+def serialize_order_rows(orders: list[dict], history: bool = False) -> list[dict]:
+    # For rows already fetched with values(*ORDER_FIELDS), e.g. a paginated page.
+    return _order_rows(orders, history)
+
+
+def iter_orders(
+    orders: QuerySet, chunk_size: int = CHUNK_SIZE, history: bool = False
+) -> Iterator[dict]:
+    # history=True renders the lines from their checkout snapshots
+    # (OrderHistorySerializer) instead of the live catalog (OrderSerializer).
+    rows = orders.values(*ORDER_FIELDS).iterator(chunk_size=chunk_size)
+    while batch := list(islice(rows, chunk_size)):
+        yield from _order_rows(batch, history)
+
+
+def serialize_shop_order_rows(links: list[dict]) -> list[dict]:
+    # OrderShop rows fetched with values(*SHOP_ORDER_FIELDS); each order shows
+    # only the shop's own lines and subtotal.
+    items = _ordered_items(
+        [link["order_id"] for link in links],
+        shop_ids={link["shop_id"] for link in links},
+    )
+    contacts = _contacts({link["order__contact_id"] for link in links})
+    return [
+        {
+            "id": link["order_id"],
+            "user": link["order__user_id"],
+            "shop": link["shop_id"],
+            "ordered_items": [
+                item
+                for item in items.get(link["order_id"], [])
+                if item["shop"] == link["shop_id"]
+            ],
+            "state": link["state"],
+            "date_time": date_time_field.to_representation(link["date_time"]),
+            "total_sum": link["total_sum"],
+            "items_count": link["items_count"],
+            "contact": contacts.get(link["order__contact_id"]),
+        }
+        for link in links
+    ]
+
+
+def iter_shop_orders(links: QuerySet, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    rows = links.values(*SHOP_ORDER_FIELDS).iterator(chunk_size=chunk_size)
+    while batch := list(islice(rows, chunk_size)):
+        yield from serialize_shop_order_rows(batch)
+
+
+def _basket_items(order_ids: list[int]) -> dict[int, list[dict]]:
+    lines = list(
+        OrderItem.objects.filter(order_id__in=order_ids).values_list(
+            "order_id", "id", "product_info_id", "quantity"
+        )
+    )
+    infos = product_info_rows({info_id for _, _, info_id, _ in lines})
+    items = {}
+    for order_id, item_id, info_id, quantity in lines:
+        items.setdefault(order_id, []).append(
+            {
+                "id": item_id,
+                "product_info": infos.get(info_id),
+                "quantity": quantity,
+            }
+        )
+    return items
+
+
+def _ordered_items(
+    order_ids: list[int], shop_ids: set[int] | None = None
+) -> dict[int, list[dict]]:
+    lines = OrderItem.objects.filter(order_id__in=order_ids)
+    if shop_ids is not None:
+        lines = lines.filter(shop_id__in=shop_ids)
+    items = {}
+    for item in lines.values(*ORDERED_ITEM_FIELDS):
+        items.setdefault(item["order_id"], []).append(
+            {
+                "id": item["id"],
+                "product_info": item["product_info_id"],
+                "product_name": item["product_name"],
+                "model": item["model"],
+                "shop": item["shop_id"],
+                "price": item["price"],
+                "quantity": item["quantity"],
+            }
+        )
+    return items
+
+
+def _order_rows(orders: list[dict], history: bool) -> list[dict]:
+    order_ids = [order["id"] for order in orders]
+    items = _ordered_items(order_ids) if history else _basket_items(order_ids)
+    contacts = _contacts({order["contact_id"] for order in orders})
+
+    return [
+        {
+            "id": order["id"],
+            "user": order["user_id"],
+            "ordered_items": items.get(order["id"], []),
+            "state": order["state"],
+            "date_time": date_time_field.to_representation(order["date_time"]),
+            "total_sum": order["total_sum"],
+            "items_count": order["items_count"],
+            "contact": contacts.get(order["contact_id"]),
+        }
+        for order in orders
+    ]
+
+
+def _contacts(contact_ids: set[int]) -> dict[int, dict]:
+    return {
+        contact["id"]: {
+            "id": contact["id"],
+            **{field: _string(contact[field]) for field in CONTACT_FIELDS[1:]},
+        }
+        for contact in Contact.objects.filter(id__in=contact_ids).values(
+            *CONTACT_FIELDS
+        )
+    }
@@ -0,0 +1,27 @@
+from rest_framework.serializers import ModelSerializer, ReadOnlyField
+
+from autosales.models import ImportJob
+
+
+class ImportJobSerializer(ModelSerializer):
+    rows_per_second = ReadOnlyField()
+
+    class Meta:
+        model = ImportJob
+        fields = (
+            "id",
+            "url",
+            "mode",
+            "state",
+            "shop",
+            "skipped",
+            "processed",
+            "total",
+            "rows_per_second",
+            "stats",
+            "errors",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
+        read_only_fields = fields
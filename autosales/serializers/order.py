@@ -1,6 +1,10 @@
 from rest_framework.exceptions import ValidationError
-from rest_framework.serializers import ModelSerializer, IntegerField
-from autosales.models import Order, OrderItem
+from rest_framework.serializers import (
+    ModelSerializer,
+    IntegerField,
+    SerializerMethodField,
+)
+from autosales.models import Order, OrderItem, OrderShop
 from .product import ProductInfoSerializer
 from .user import ContactSerializer
 from django.utils.translation import gettext_lazy as _
@@ -48,6 +52,7 @@ class OrderSerializer(ModelSerializer):
             "state",
             "date_time",
             "total_sum",
+            "items_count",
             "contact",
         )
         read_only_fields = ("id",)
@@ -58,3 +63,55 @@ class OrderSerializer(ModelSerializer):
                 _("Поля 'Пользователь', 'Состояние' и 'Контакты' обязательны")
             )
         return attrs
+
+
+class OrderedItemSerializer(ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = (
+            "id",
+            "product_info",
+            "product_name",
+            "model",
+            "shop",
+            "price",
+            "quantity",
+        )
+        read_only_fields = fields
+
+
+class OrderHistorySerializer(OrderSerializer):
+    ordered_items = OrderedItemSerializer(read_only=True, many=True)
+
+
+class ShopOrderSerializer(ModelSerializer):
+    # Expects order__ordered_items and order__contact to be prefetched.
+    id = IntegerField(source="order_id", read_only=True)
+    user = IntegerField(source="order.user_id", read_only=True)
+    ordered_items = SerializerMethodField()
+    contact = ContactSerializer(source="order.contact", read_only=True)
+
+    class Meta:
+        model = OrderShop
+        fields = (
+            "id",
+            "user",
+            "shop",
+            "ordered_items",
+            "state",
+            "date_time",
+            "total_sum",
+            "items_count",
+            "contact",
+        )
+        read_only_fields = fields
+
+    def get_ordered_items(self, link):
+        return OrderedItemSerializer(
+            [
+                item
+                for item in link.order.ordered_items.all()
+                if item.shop_id == link.shop_id
+            ],
+            many=True,
+        ).data
@@ -35,7 +35,7 @@ class ProductParameterSerializer(ModelSerializer):
 
 class ProductInfoSerializer(ModelSerializer):
     product = ProductSerializer(read_only=True)
-    product_parameter = ProductParameterSerializer(many=True, read_only=True)
+    product_parameters = ProductParameterSerializer(many=True, read_only=True)
 
     class Meta:
         model = ProductInfo
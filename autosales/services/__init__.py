@@ -0,0 +1,153 @@
+__all__ = (
+    "CatalogImporter",
+    "ImportStats",
+    "import_feed",
+    "SYNC",
+    "REPLACE",
+    "MODES",
+    "Feed",
+    "FeedError",
+    "FORMATS",
+    "detect_format",
+    "download_feed",
+    "open_feed",
+    "read_feed",
+    "enqueue_import",
+    "claim_job",
+    "start_job",
+    "run_job",
+    "bump_versions",
+    "bump_shops",
+    "get_versions",
+    "shop_key",
+    "CATALOG",
+    "CATEGORIES",
+    "SHOPS",
+    "cache_key",
+    "get_cached",
+    "set_cached",
+    "cache_stats",
+    "make_etag",
+    "not_modified",
+    "search_offer_ids",
+    "index_offers",
+    "unindex_offers",
+    "get_facets",
+    "offer_facets",
+    "update_facets",
+    "parameter_filters",
+    "filter_by_parameters",
+    "rebuild_facets",
+    "catalog_entries",
+    "refresh_entries",
+    "remove_entries",
+    "set_shops_active",
+    "validate_basket_items",
+    "add_basket_items",
+    "refresh_basket_totals",
+    "update_basket_quantities",
+    "remove_basket_items",
+    "recalculate_totals",
+    "snapshot_items",
+    "checkout_order",
+    "link_shops",
+    "filter_orders",
+    "OrderFilterError",
+    "StockShortage",
+    "UnavailableItems",
+    "reserve_stock",
+    "release_reservations",
+    "release_expired",
+    "consume_reservations",
+    "ORDER_TRANSITIONS",
+    "TransitionError",
+    "transition_orders",
+    "EXPORT_FORMATS",
+    "ExportStats",
+    "export_rows",
+    "export_lines",
+    "add_sales",
+    "remove_sales",
+    "rebuild_rollups",
+    "sales_stats",
+    "idempotent",
+    "purge_idempotency_keys",
+    "queue_state_notifications",
+    "send_notifications",
+)
+
+from .importer import CatalogImporter, ImportStats, import_feed, SYNC, REPLACE, MODES
+from .feeds import (
+    Feed,
+    FeedError,
+    FORMATS,
+    detect_format,
+    download_feed,
+    open_feed,
+    read_feed,
+)
+from .jobs import enqueue_import, claim_job, start_job, run_job
+from .versions import (
+    bump_versions,
+    bump_shops,
+    get_versions,
+    shop_key,
+    CATALOG,
+    CATEGORIES,
+    SHOPS,
+)
+from .cache import (
+    cache_key,
+    get_cached,
+    set_cached,
+    cache_stats,
+    make_etag,
+    not_modified,
+)
+from .search import search_offer_ids, index_offers, unindex_offers
+from .facets import (
+    get_facets,
+    offer_facets,
+    update_facets,
+    parameter_filters,
+    filter_by_parameters,
+    rebuild_facets,
+)
+from .catalog import (
+    catalog_entries,
+    refresh_entries,
+    remove_entries,
+    set_shops_active,
+)
+from .basket import (
+    validate_basket_items,
+    add_basket_items,
+    refresh_basket_totals,
+    update_basket_quantities,
+    remove_basket_items,
+)
+from .orders import (
+    recalculate_totals,
+    snapshot_items,
+    checkout_order,
+    link_shops,
+    filter_orders,
+    OrderFilterError,
+    UnavailableItems,
+)
+from .stock import (
+    StockShortage,
+    reserve_stock,
+    release_reservations,
+    consume_reservations,
+)
+from .transitions import (
+    ORDER_TRANSITIONS,
+    TransitionError,
+    transition_orders,
+    release_expired,
+)
+from .export import EXPORT_FORMATS, ExportStats, export_rows, export_lines
+from .idempotency import idempotent, purge_idempotency_keys
+from .rollups import add_sales, remove_sales, rebuild_rollups, sales_stats
+from .notifications import queue_state_notifications, send_notifications
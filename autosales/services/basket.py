@@ -0,0 +1,154 @@
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from autosales.models import OrderItem, ProductInfo
+from .orders import recalculate_totals
+
+
+def validate_basket_items(
+    items, order_id: int | None = None
+) -> tuple[dict[int, int], dict[int, str]]:
+    # Returns {product_info_id: quantity} with repeated offers merged, and the
+    # errors keyed by the position of the item in the request. Quantities are
+    # added to the lines already in the basket, and the resulting totals must
+    # fit the stock of the offers.
+    if not isinstance(items, list):
+        return {}, {0: "Ожидается список позиций"}
+    lines, errors = {}, {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = "Неверный формат позиции"
+            continue
+        product_info, quantity = item.get("product_info"), item.get("quantity")
+        if type(product_info) is not int:
+            errors[index] = "Поле 'Информация о продукте' является обязательным"
+        elif type(quantity) is not int or quantity <= 0:
+            errors[index] = "Количество должно быть числом больше 0"
+        else:
+            lines[product_info] = lines.get(product_info, 0) + quantity
+
+    stock = dict(
+        ProductInfo.objects.filter(id__in=lines, active=True).values_list(
+            "id", "quantity"
+        )
+    )
+    in_basket = {}
+    if order_id is not None:
+        in_basket = dict(
+            OrderItem.objects.filter(
+                order_id=order_id, product_info_id__in=lines
+            ).values_list("product_info_id", "quantity")
+        )
+    for index, item in enumerate(items):
+        if index in errors:
+            continue
+        info_id = item["product_info"]
+        if info_id not in stock:
+            errors[index] = "Товар не найден"
+        elif lines[info_id] + in_basket.get(info_id, 0) > stock[info_id]:
+            errors[index] = f"Недостаточно товара на складе, доступно: {stock[info_id]}"
+    return lines, dict(sorted(errors.items()))
+
+
+def add_basket_items(order_id: int, lines: dict[int, int]) -> int:
+    # Adding an offer that is already in the basket increases its quantity;
+    # update_basket_quantities is the one that replaces it. Missing lines are
+    # inserted empty and every line is then increased in SQL, so concurrent
+    # additions of the same offer add up.
+    with transaction.atomic():
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order_id=order_id, product_info_id=info_id, quantity=0)
+                for info_id in lines
+            ],
+            ignore_conflicts=True,
+        )
+        OrderItem.objects.filter(order_id=order_id, product_info_id__in=lines).update(
+            quantity=F("quantity")
+            + Case(
+                *(
+                    When(product_info_id=info_id, then=Value(quantity))
+                    for info_id, quantity in lines.items()
+                ),
+                output_field=PositiveIntegerField(),
+            )
+        )
+        recalculate_totals([order_id])
+    return len(lines)
+
+
+def refresh_basket_totals(offer_ids) -> int:
+    # Baskets are priced from the live catalog, so the ones holding offers an
+    # import repriced or retired are recalculated.
+    return recalculate_totals(
+        OrderItem.objects.filter(
+            order__state="basket", product_info_id__in=list(offer_ids)
+        )
+        .values_list("order_id", flat=True)
+        .distinct()
+    )
+
+
+def update_basket_quantities(order_id: int, items) -> tuple[int, list[dict]]:
+    # Stock is checked against the offers in the same query that loads the
+    # lines, and all valid changes are applied by a single UPDATE.
+    if not isinstance(items, list):
+        return 0, [{"Status": False, "Error": "Ожидается список позиций"}]
+    item_ids = [
+        item["id"]
+        for item in items
+        if isinstance(item, dict) and type(item.get("id")) is int
+    ]
+    stock = dict(
+        OrderItem.objects.filter(order_id=order_id, id__in=item_ids).values_list(
+            "id", "product_info__quantity"
+        )
+    )
+
+    results, changes = [], {}
+    for item in items:
+        item_id = item.get("id") if isinstance(item, dict) else None
+        quantity = item.get("quantity") if isinstance(item, dict) else None
+        error = None
+        if type(item_id) is not int:
+            error = "Неверный формат позиции"
+        elif item_id not in stock:
+            error = "Позиция не найдена в корзине"
+        elif type(quantity) is not int or quantity <= 0:
+            error = "Количество должно быть числом больше 0"
+        elif stock[item_id] is None:
+            error = "Товар больше не продаётся"
+        elif quantity > stock[item_id]:
+            error = f"Недостаточно товара на складе, доступно: {stock[item_id]}"
+        if error:
+            results.append({"id": item_id, "Status": False, "Error": error})
+        else:
+            changes[item_id] = quantity
+            results.append({"id": item_id, "Status": True, "quantity": quantity})
+
+    updated = 0
+    if changes:
+        with transaction.atomic():
+            updated = OrderItem.objects.filter(
+                order_id=order_id, id__in=changes
+            ).update(
+                quantity=Case(
+                    *(
+                        When(id=item_id, then=Value(quantity))
+                        for item_id, quantity in changes.items()
+                    ),
+                    default=F("quantity"),
+                    output_field=PositiveIntegerField(),
+                )
+            )
+            recalculate_totals([order_id])
+    return updated, results
+
+
+def remove_basket_items(order_id: int, item_ids: list[int]) -> int:
+    with transaction.atomic():
+        deleted = OrderItem.objects.filter(order_id=order_id, id__in=item_ids).delete()[
+            0
+        ]
+        recalculate_totals([order_id])
+    return deleted
@@ -0,0 +1,70 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+
+from .versions import get_versions
+
+HITS = "stats:hits"
+MISSES = "stats:misses"
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE]
+
+
+def cache_key(request, prefix: str, *version_keys: str) -> str:
+    # Versions are part of the key, so bumping a shop's version makes every
+    # cached page that depends on it unreachable without deleting anything.
+    versions = get_versions(*version_keys)
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(f"{request.get_host()}?{query}".encode()).hexdigest()
+    stamp = "-".join(f"{key}.{value}" for key, value in sorted(versions.items()))
+    return f"{prefix}:{stamp}:{digest}"
+
+
+def make_etag(key: str) -> str:
+    # Weak, since gzip-encoded and plain bodies share the validator.
+    return f'W/"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+def not_modified(request, etag: str):
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+    return response
+
+
+def get_cached(key: str):
+    cache = get_cache()
+    data = cache.get(key)
+    _count(cache, MISSES if data is None else HITS)
+    return data
+
+
+def set_cached(key: str, data) -> None:
+    get_cache().set(key, data)
+
+
+def cache_stats() -> dict:
+    cache = get_cache()
+    hits = cache.get(HITS, 0)
+    misses = cache.get(MISSES, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 3) if total else 0.0,
+        "miss_ratio": round(misses / total, 3) if total else 0.0,
+    }
+
+
+def _count(cache, key: str) -> None:
+    if cache.add(key, 1, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
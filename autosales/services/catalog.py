@@ -0,0 +1,79 @@
+from typing import Iterable
+
+from autosales.models import CatalogEntry, Product, ProductInfo
+from autosales.serializers import ProductInfoSerializer
+from autosales.serializers.fast import product_info_rows
+
+BATCH_SIZE = 1000
+UPDATE_FIELDS = ("shop", "product", "active", "payload")
+
+
+def refresh_entries(
+    ids: Iterable[int], batch_size: int = BATCH_SIZE, fast: bool = True
+) -> int:
+    # Renders offers once, at write time, so the catalog endpoints can return
+    # the stored payload as is. The fast path produces the same payload as
+    # ProductInfoSerializer without instantiating models.
+    ids = list(ids)
+    refreshed = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        if fast:
+            payloads = product_info_rows(batch)
+        else:
+            payloads = {
+                payload["id"]: payload
+                for payload in ProductInfoSerializer(
+                    ProductInfo.objects.filter(id__in=batch).prefetch_related(
+                        "product__categories", "product_parameters__parameter"
+                    ),
+                    many=True,
+                ).data
+            }
+        offers = ProductInfo.objects.filter(
+            id__in=list(payloads), active=True
+        ).values_list("id", "shop_id", "product_id", "shop__state")
+        CatalogEntry.objects.bulk_create(
+            [
+                CatalogEntry(
+                    offer_id=offer_id,
+                    shop_id=shop_id,
+                    product_id=product_id,
+                    active=active,
+                    payload=payloads[offer_id],
+                )
+                for offer_id, shop_id, product_id, active in offers
+            ],
+            update_conflicts=True,
+            unique_fields=["offer"],
+            update_fields=UPDATE_FIELDS,
+        )
+        remove_entries(
+            ProductInfo.objects.filter(id__in=batch, active=False).values("id")
+        )
+        refreshed += len(payloads)
+    return refreshed
+
+
+def remove_entries(ids) -> int:
+    return CatalogEntry.objects.filter(offer_id__in=ids).delete()[0]
+
+
+def set_shops_active(shop_ids: Iterable[int], active: bool) -> int:
+    return CatalogEntry.objects.filter(shop_id__in=list(shop_ids)).update(active=active)
+
+
+def catalog_entries(
+    shop_id: str | None = None,
+    category_id: str | None = None,
+):
+    entries = CatalogEntry.objects.filter(active=True)
+    if shop_id:
+        entries = entries.filter(shop_id=shop_id)
+    if category_id:
+        entries = entries.filter(
+            product_id__in=Product.categories.through.objects.filter(
+                category_id=category_id
+            ).values("product_id")
+        )
+    return entries.only("offer_id", "payload")
@@ -0,0 +1,127 @@
+import csv
+import io
+import logging
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from time import perf_counter
+from typing import Iterator
+
+from django.db.models import QuerySet
+from rest_framework.fields import DateTimeField
+from ujson import dumps as dump_json
+
+from autosales.models import OrderItem
+
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+JSONL = "jsonl"
+EXPORT_FORMATS = {
+    CSV: "text/csv; charset=utf-8",
+    JSONL: "application/x-ndjson; charset=utf-8",
+}
+EXPORT_FIELDS = (
+    "order_id",
+    "date_time",
+    "state",
+    "shop_id",
+    "shop_total",
+    "item_id",
+    "product_info_id",
+    "product_name",
+    "model",
+    "price",
+    "quantity",
+)
+CHUNK_SIZE = 2000
+
+date_time_field = DateTimeField()
+
+
+@dataclass
+class ExportStats:
+    orders: int = 0
+    lines: int = 0
+    seconds: float = 0.0
+    started: float = field(default_factory=perf_counter, repr=False)
+
+    @property
+    def lines_per_second(self) -> float:
+        if not self.seconds:
+            return 0.0
+        return round(self.lines / self.seconds, 1)
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        del stats["started"]
+        stats["seconds"] = round(self.seconds, 3)
+        stats["lines_per_second"] = self.lines_per_second
+        return stats
+
+
+def export_rows(
+    links: QuerySet, chunk_size: int = CHUNK_SIZE, stats: ExportStats | None = None
+) -> Iterator[tuple]:
+    # One row per order line of the OrderShop rows in links, read through a
+    # server-side cursor a chunk of orders at a time, so memory stays flat
+    # however long the export is.
+    stats = stats if stats is not None else ExportStats()
+    orders = links.values_list(
+        "order_id", "shop_id", "date_time", "state", "total_sum"
+    ).iterator(chunk_size=chunk_size)
+    while batch := list(islice(orders, chunk_size)):
+        lines = {}
+        for line in (
+            OrderItem.objects.filter(
+                order_id__in=[order[0] for order in batch],
+                shop_id__in={order[1] for order in batch},
+            )
+            .order_by("order_id", "id")
+            .values_list(
+                "order_id",
+                "shop_id",
+                "id",
+                "product_info_id",
+                "product_name",
+                "model",
+                "price",
+                "quantity",
+            )
+        ):
+            lines.setdefault(line[:2], []).append(line[2:])
+        for order_id, shop_id, date_time, state, total_sum in batch:
+            moment = date_time_field.to_representation(date_time)
+            for line in lines.get((order_id, shop_id), ()):
+                yield (order_id, moment, state, shop_id, total_sum, *line)
+                stats.lines += 1
+        stats.orders += len(batch)
+        stats.seconds = perf_counter() - stats.started
+    stats.seconds = perf_counter() - stats.started
+    logger.info(
+        "Exported %s orders, %s lines in %.2fs (%s lines/s)",
+        stats.orders,
+        stats.lines,
+        stats.seconds,
+        stats.lines_per_second,
+    )
+
+
+def export_lines(rows: Iterator[tuple], export_format: str = CSV) -> Iterator[str]:
+    if export_format == JSONL:
+        for row in rows:
+            yield dump_json(
+                dict(zip(EXPORT_FIELDS, row)),
+                ensure_ascii=False,
+                escape_forward_slashes=False,
+            ) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
@@ -0,0 +1,166 @@
+import re
+from collections import Counter
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, F, QuerySet, Sum
+
+from autosales.models import ProductFacet, ProductParameter
+
+PARAM = re.compile(r"^param\[(.+)\]$")
+FACET_LIMIT = 20
+BATCH_SIZE = 1000
+
+
+def parameter_filters(query_params) -> dict[str, list[str]]:
+    filters = {}
+    for key in query_params:
+        match = PARAM.match(key)
+        if match:
+            values = [value for value in query_params.getlist(key) if value]
+            if values:
+                filters[match.group(1)] = values
+    return filters
+
+
+def parameter_subqueries(filters: dict[str, list[str]]) -> list[QuerySet]:
+    return [
+        ProductParameter.objects.filter(parameter__name=name, value__in=values).values(
+            "product_info_id"
+        )
+        for name, values in filters.items()
+    ]
+
+
+def filter_by_parameters(
+    queryset: QuerySet, filters: dict[str, list[str]], field: str = "id"
+):
+    for subquery in parameter_subqueries(filters):
+        queryset = queryset.filter(**{f"{field}__in": subquery})
+    return queryset
+
+
+def rebuild_facets(shop_id: int) -> int:
+    # One row per (category, parameter, value) plus the category-less totals;
+    # an offer whose product sits in several categories counts once per
+    # category, but only once in the totals.
+    parameters = ProductParameter.objects.filter(
+        product_info__shop_id=shop_id, product_info__active=True
+    )
+    totals = parameters.values("parameter_id", "value").annotate(count=Count("id"))
+    by_category = (
+        parameters.filter(product_info__product__categories__isnull=False)
+        .values(
+            "parameter_id", "value", category_id=F("product_info__product__categories")
+        )
+        .annotate(count=Count("id"))
+    )
+    with transaction.atomic():
+        ProductFacet.objects.filter(shop_id=shop_id).delete()
+        facets = ProductFacet.objects.bulk_create(
+            [
+                ProductFacet(shop_id=shop_id, **row)
+                for rows in (totals, by_category)
+                for row in rows.order_by().iterator()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    return len(facets)
+
+
+def offer_facets(ids: Iterable[int]) -> Counter:
+    # The facet rows the given offers contribute to, keyed by
+    # (shop, category, parameter, value) with category None for the totals.
+    parameters = ProductParameter.objects.filter(
+        product_info_id__in=list(ids), product_info__active=True
+    ).order_by()
+    counts = Counter()
+    for row in parameters.values_list(
+        "product_info__shop_id", "parameter_id", "value"
+    ).annotate(count=Count("id")):
+        shop_id, parameter_id, value, count = row
+        counts[shop_id, None, parameter_id, value] += count
+    for row in (
+        parameters.filter(product_info__product__categories__isnull=False)
+        .values_list(
+            "product_info__shop_id",
+            "product_info__product__categories",
+            "parameter_id",
+            "value",
+        )
+        .annotate(count=Count("id"))
+    ):
+        *key, count = row
+        counts[tuple(key)] += count
+    return counts
+
+
+def update_facets(before: Counter, after: Counter) -> None:
+    # Applies the difference between two offer_facets() snapshots of the
+    # same offers, taken before and after they were changed.
+    deltas = after.copy()
+    deltas.subtract(before)
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    rows = {
+        (row.shop_id, row.category_id, row.parameter_id, row.value): row
+        for row in ProductFacet.objects.filter(
+            shop_id__in={key[0] for key in deltas},
+            parameter_id__in={key[2] for key in deltas},
+            value__in={key[3] for key in deltas},
+        )
+    }
+    created, updated, emptied = [], [], []
+    for key, delta in deltas.items():
+        row = rows.get(key)
+        if row is None:
+            if delta > 0:
+                shop_id, category_id, parameter_id, value = key
+                created.append(
+                    ProductFacet(
+                        shop_id=shop_id,
+                        category_id=category_id,
+                        parameter_id=parameter_id,
+                        value=value,
+                        count=delta,
+                    )
+                )
+        elif row.count + delta > 0:
+            row.count += delta
+            updated.append(row)
+        else:
+            emptied.append(row.id)
+    ProductFacet.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    ProductFacet.objects.bulk_update(updated, ["count"], batch_size=BATCH_SIZE)
+    ProductFacet.objects.filter(id__in=emptied).delete()
+
+
+def get_facets(
+    shop_id: str | None = None,
+    category_id: str | None = None,
+    offer_ids: QuerySet | list[int] | None = None,
+    limit: int = FACET_LIMIT,
+) -> dict[str, list[dict]]:
+    # Without offer_ids the counts come from the precomputed shop/category
+    # rows; a filtered or searched result set is counted in one GROUP BY over
+    # the parameters of its offers.
+    if offer_ids is None:
+        rows = ProductFacet.objects.filter(shop__state=True, category_id=category_id)
+        if shop_id:
+            rows = rows.filter(shop_id=shop_id)
+        count = Sum("count")
+    else:
+        rows = ProductParameter.objects.filter(product_info_id__in=offer_ids)
+        count = Count("id")
+    rows = (
+        rows.values("parameter__name", "value")
+        .annotate(count=count)
+        .order_by("parameter__name", "-count", "value")
+    )
+    facets = {}
+    for row in rows:
+        values = facets.setdefault(row["parameter__name"], [])
+        if len(values) < limit:
+            values.append({"value": row["value"], "count": row["count"]})
+    return facets
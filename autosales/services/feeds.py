@@ -0,0 +1,319 @@
+import csv
+import hashlib
+import io
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cache
+from itertools import chain
+from tempfile import TemporaryFile
+from typing import BinaryIO, Iterator
+from urllib.parse import urlparse
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from ujson import loads as load_json
+from yaml import (
+    MarkedYAMLError,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    YAMLError,
+)
+from yaml.nodes import ScalarNode
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+YAML = "yaml"
+JSONL = "jsonl"
+CSV = "csv"
+FORMATS = (YAML, JSONL, CSV)
+
+CHUNK_SIZE = 1024 * 1024
+TIMEOUT = (5, 60)
+POOL_SIZE = 10
+
+CSV_FIELDS = (
+    "shop",
+    "id",
+    "category",
+    "category_name",
+    "name",
+    "model",
+    "price",
+    "price_rrc",
+    "quantity",
+)
+
+
+class FeedError(ValueError):
+    pass
+
+
+@dataclass
+class Feed:
+    shop: str
+    categories: list[dict]
+    goods: Iterator[dict]
+
+
+@dataclass
+class FetchedFeed:
+    stream: BinaryIO | None
+    etag: str = ""
+    last_modified: str = ""
+    sha256: str = ""
+    skipped: bool = False
+
+
+def detect_format(name: str) -> str:
+    name = name.lower().split("?", 1)[0]
+    if name.endswith((".jsonl", ".ndjson")):
+        return JSONL
+    if name.endswith(".csv"):
+        return CSV
+    return YAML
+
+
+@cache
+def get_session() -> Session:
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@contextmanager
+def download_feed(
+    url: str,
+    etag: str = "",
+    last_modified: str = "",
+    sha256: str = "",
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[FetchedFeed]:
+    # The validators come from the previous successful import: the server may
+    # answer 304, and otherwise an identical body is detected by its SHA-256.
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with TemporaryFile() as file:
+        digest = hashlib.sha256()
+        with get_session().get(
+            url, headers=headers, stream=True, timeout=TIMEOUT
+        ) as response:
+            if response.status_code == 304:
+                yield FetchedFeed(None, etag, last_modified, sha256, skipped=True)
+                return
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size):
+                digest.update(chunk)
+                file.write(chunk)
+        file.seek(0)
+        yield FetchedFeed(
+            stream=file,
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+            sha256=digest.hexdigest(),
+            skipped=bool(sha256) and digest.hexdigest() == sha256,
+        )
+
+
+@contextmanager
+def open_feed(source: str) -> Iterator[BinaryIO]:
+    if urlparse(source).scheme in ("http", "https"):
+        with download_feed(source) as fetched:
+            yield fetched.stream
+    else:
+        with open(source, "rb") as file:
+            yield file
+
+
+def count_rows(stream: BinaryIO, feed_format: str) -> int | None:
+    if feed_format not in (JSONL, CSV):
+        return None
+    start = stream.tell()
+    lines = sum(1 for line in stream if line.strip())
+    stream.seek(start)
+    return max(lines - 1, 0)
+
+
+def read_feed(stream: BinaryIO, feed_format: str = YAML) -> Feed:
+    if feed_format == YAML:
+        return _read_yaml(stream)
+    if feed_format == JSONL:
+        return _read_jsonl(stream)
+    if feed_format == CSV:
+        return _read_csv(stream)
+    raise FeedError(f"Неизвестный формат прайс-листа: {feed_format}")
+
+
+def _read_yaml(stream: BinaryIO) -> Feed:
+    start = stream.tell()
+    try:
+        header = _read_yaml_header(stream)
+    except YAMLError as error:
+        raise _yaml_error(error) from error
+    if "shop" not in header:
+        raise FeedError("В прайс-листе не указан магазин")
+    return Feed(
+        shop=header["shop"],
+        categories=header.get("categories") or [],
+        goods=_iter_yaml_goods(stream, start),
+    )
+
+
+def _read_yaml_header(stream: BinaryIO) -> dict:
+    # Collects every top-level key except "goods". When the header keys come
+    # after the goods list the goods events are skipped and read again later.
+    loader = SafeLoader(stream)
+    header = {}
+    try:
+        _open_document(loader)
+        while not loader.check_event(MappingEndEvent):
+            key = _build(loader)
+            if key == "goods":
+                if "shop" in header and "categories" in header:
+                    return header
+                _skip(loader)
+            else:
+                header[key] = _build(loader)
+    finally:
+        loader.dispose()
+    return header
+
+
+def _iter_yaml_goods(stream: BinaryIO, offset: int) -> Iterator[dict]:
+    stream.seek(offset)
+    loader = SafeLoader(stream)
+    try:
+        _open_document(loader)
+        while not loader.check_event(MappingEndEvent):
+            if _build(loader) != "goods":
+                _skip(loader)
+                continue
+            if not loader.check_event(SequenceStartEvent):
+                raise FeedError("Поле 'goods' должно быть списком")
+            loader.get_event()
+            while not loader.check_event(SequenceEndEvent):
+                yield _build(loader)
+            loader.get_event()
+    except YAMLError as error:
+        raise _yaml_error(error) from error
+    finally:
+        loader.dispose()
+
+
+def _yaml_error(error: YAMLError) -> FeedError:
+    if isinstance(error, MarkedYAMLError) and error.problem_mark is not None:
+        return FeedError(
+            f"Ошибка YAML в строке {error.problem_mark.line + 1}: {error.problem}"
+        )
+    return FeedError(f"Ошибка YAML: {error}")
+
+
+def _open_document(loader) -> None:
+    loader.get_event()
+    loader.get_event()
+    if not loader.check_event(MappingStartEvent):
+        raise FeedError("Неверный формат прайс-листа")
+    loader.get_event()
+
+
+def _build(loader):
+    event = loader.get_event()
+    if isinstance(event, ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(ScalarNode, event.value, event.implicit)
+        return loader.construct_document(ScalarNode(tag, event.value))
+    if isinstance(event, SequenceStartEvent):
+        items = []
+        while not loader.check_event(SequenceEndEvent):
+            items.append(_build(loader))
+        loader.get_event()
+        return items
+    if isinstance(event, MappingStartEvent):
+        mapping = {}
+        while not loader.check_event(MappingEndEvent):
+            key = _build(loader)
+            mapping[key] = _build(loader)
+        loader.get_event()
+        return mapping
+    raise FeedError(f"Неподдерживаемая конструкция YAML: {event}")
+
+
+def _skip(loader) -> None:
+    depth = 0
+    while True:
+        event = loader.get_event()
+        if isinstance(event, (MappingStartEvent, SequenceStartEvent)):
+            depth += 1
+        elif isinstance(event, (MappingEndEvent, SequenceEndEvent)):
+            depth -= 1
+        if depth == 0:
+            return
+
+
+def _read_jsonl(stream: BinaryIO) -> Feed:
+    lines = ((number, line) for number, line in enumerate(stream, 1) if line.strip())
+    header = next(lines, None)
+    if header is None:
+        raise FeedError("Прайс-лист пуст")
+    header = _load_json_line(*header)
+    if not isinstance(header, dict) or "shop" not in header:
+        raise FeedError("В прайс-листе не указан магазин")
+    return Feed(
+        shop=header["shop"],
+        categories=header.get("categories") or [],
+        goods=(_load_json_line(number, line) for number, line in lines),
+    )
+
+
+def _load_json_line(number: int, line: bytes):
+    try:
+        return load_json(line)
+    except ValueError as error:
+        raise FeedError(f"Ошибка JSON в строке {number}: {error}") from error
+
+
+def _read_csv(stream: BinaryIO) -> Feed:
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+    first = next(reader, None)
+    if first is None:
+        raise FeedError("Прайс-лист пуст")
+    if not first.get("shop"):
+        raise FeedError("В прайс-листе не указан магазин")
+    return Feed(
+        shop=first["shop"],
+        categories=[],
+        goods=_iter_csv_goods(reader, first),
+    )
+
+
+def _iter_csv_goods(reader: csv.DictReader, first: dict) -> Iterator[dict]:
+    # CSV has no category list, so ids are checked row by row: the importer
+    # creates categories from category_name and links the rest to known ones.
+    for row in chain([first], reader):
+        yield _csv_item(row, reader.line_num)
+
+
+def _csv_item(row: dict, line: int) -> dict:
+    if not str(row.get("category") or "").strip().isdigit():
+        raise FeedError(
+            f"Неверный id категории в строке {line}: {row.get('category')!r}"
+        )
+    item = {field: row[field] for field in CSV_FIELDS if row.get(field)}
+    item["parameters"] = {
+        name: value
+        for name, value in row.items()
+        if name not in CSV_FIELDS and name and value
+    }
+    return item
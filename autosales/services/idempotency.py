@@ -0,0 +1,143 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from ujson import dumps as dump_json
+
+from autosales.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+KEY_LENGTH = 255
+
+
+def request_fingerprint(request) -> str:
+    data = request.data
+    if hasattr(data, "lists"):
+        data = {key: values for key, values in data.lists()}
+    body = dump_json(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(
+        f"{request.method} {request.path} {body}".encode()
+    ).hexdigest()
+
+
+def claim_key(
+    user_id: int, key: str, fingerprint: str, locked_until: datetime
+) -> IdempotencyKey | None:
+    # Returns None when the key is new and now belongs to this request,
+    # otherwise the record left by the first request with this key. A key
+    # whose request never finished is taken over once its lock has run out;
+    # IDEMPOTENCY_LOCK_TTL outlasts the request timeout, so by then the first
+    # request is gone. locked_until identifies the holder to store_response
+    # and release_key.
+    now = timezone.now()
+    IdempotencyKey.objects.filter(
+        user_id=user_id, key=key, expires_at__lte=now
+    ).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                user_id=user_id,
+                key=key,
+                fingerprint=fingerprint,
+                locked_until=locked_until,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+    except IntegrityError:
+        if IdempotencyKey.objects.filter(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            status_code__isnull=True,
+            locked_until__lte=now,
+        ).update(locked_until=locked_until):
+            return None
+        return IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+    return None
+
+
+def store_response(
+    user_id: int, key: str, locked_until: datetime, status_code: int, data
+) -> None:
+    IdempotencyKey.objects.filter(
+        user_id=user_id, key=key, locked_until=locked_until
+    ).update(status_code=status_code, response=data, locked_until=None)
+
+
+def release_key(user_id: int, key: str, locked_until: datetime) -> None:
+    IdempotencyKey.objects.filter(
+        user_id=user_id, key=key, locked_until=locked_until, status_code__isnull=True
+    ).delete()
+
+
+def purge_idempotency_keys(batch_size: int = 1000) -> int:
+    purged = 0
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+    while ids := list(expired.values_list("id", flat=True)[:batch_size]):
+        purged += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+    return purged
+
+
+def idempotent(method):
+    # A repeated request with the same Idempotency-Key gets the stored response
+    # back without running the view again. Keys are scoped to the user; server
+    # errors and exceptions free the key so the client can retry.
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return method(view, request, *args, **kwargs)
+        if len(key) > KEY_LENGTH:
+            return Response(
+                {"Status": False, "Errors": "Слишком длинный ключ идемпотентности"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request)
+        locked_until = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TTL)
+        stored = claim_key(request.user.id, key, fingerprint, locked_until)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        try:
+            response = method(view, request, *args, **kwargs)
+        except BaseException:
+            release_key(request.user.id, key, locked_until)
+            raise
+        if isinstance(response, Response) and response.status_code < 500:
+            store_response(
+                request.user.id,
+                key,
+                locked_until,
+                response.status_code,
+                response.data,
+            )
+        else:
+            release_key(request.user.id, key, locked_until)
+        return response
+
+    return wrapper
+
+
+def _replay(stored: IdempotencyKey, fingerprint: str) -> Response:
+    if stored.fingerprint != fingerprint:
+        return Response(
+            {
+                "Status": False,
+                "Errors": "Ключ идемпотентности уже использован для другого запроса",
+            },
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if stored.status_code is None:
+        return Response(
+            {"Status": False, "Errors": "Запрос с этим ключом еще выполняется"},
+            status=status.HTTP_409_CONFLICT,
+        )
+    response = Response(stored.response, status=stored.status_code)
+    response[REPLAYED_HEADER] = "true"
+    return response
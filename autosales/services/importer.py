@@ -0,0 +1,431 @@
+from collections import Counter
+from contextlib import nullcontext
+from dataclasses import dataclass, asdict
+from time import perf_counter
+from typing import Callable, Iterable, Iterator
+
+from django.db import connection, transaction
+
+from autosales.models import (
+    Category,
+    Parameter,
+    Product,
+    ProductInfo,
+    ProductParameter,
+    Shop,
+)
+from autosales.signals.signals import (
+    catalog_imported,
+    offers_changed,
+    offers_removed,
+)
+from .facets import offer_facets, update_facets
+from .feeds import Feed, FeedError
+from .versions import CATEGORIES, bump_shops, bump_versions
+
+BATCH_SIZE = 1000
+CACHE_LIMIT = 100_000
+
+SYNC = "sync"
+REPLACE = "replace"
+MODES = (SYNC, REPLACE)
+
+SYNC_FIELDS = ("product_id", "model", "price", "price_rrc", "quantity", "active")
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    parameters: int = 0
+    queries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.seconds:
+            return 0.0
+        return round(self.rows / self.seconds, 1)
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        stats["seconds"] = round(self.seconds, 3)
+        stats["rows_per_second"] = self.rows_per_second
+        return stats
+
+
+class CatalogImporter:
+    def __init__(
+        self,
+        shop: Shop,
+        mode: str = SYNC,
+        batch_size: int = BATCH_SIZE,
+        atomic: bool = True,
+        progress: Callable[[ImportStats], None] | None = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown import mode: {mode}")
+        self.shop = shop
+        self.mode = mode
+        self.batch_size = batch_size
+        self.atomic = atomic
+        self.progress = progress
+        self.stats = ImportStats()
+        self._existing: dict[int, int] = {}
+        self._seen: set[int] = set()
+        self._categories: set[int] = set()
+        self._products: dict[str, int] = {}
+        self._parameters: dict[str, int] = {}
+        self._product_categories: set[tuple[int, int]] = set()
+        self._touched_shops: set[int] = set()
+
+    def run(self, categories: Iterable[dict], goods: Iterable[dict]) -> ImportStats:
+        # With atomic=False every batch is committed on its own, so progress is
+        # visible to other connections; offers are only retired after the last
+        # batch has been imported. Both modes match offers by external id,
+        # retired ones included; replace rewrites every offer in the feed.
+        counter = QueryCounter()
+        started = perf_counter()
+        with connection.execute_wrapper(counter), self._transaction(self.atomic):
+            with self._transaction(not self.atomic):
+                self.import_categories(categories)
+                self._existing = dict(
+                    ProductInfo.objects.filter(shop_id=self.shop.id).values_list(
+                        "external_id", "id"
+                    )
+                )
+            for batch in chunked(goods, self.batch_size):
+                with self._transaction(not self.atomic):
+                    self.import_goods(batch)
+                self.stats.queries = counter.count
+                self.stats.seconds = perf_counter() - started
+                if self.progress:
+                    self.progress(self.stats)
+            with self._transaction(not self.atomic):
+                self._retire_missing()
+            catalog_imported.send(sender=self.__class__, shop_id=self.shop.id)
+            bump_shops(self.shop.id, *self._touched_shops)
+        self.stats.queries = counter.count
+        self.stats.seconds = perf_counter() - started
+        return self.stats
+
+    @staticmethod
+    def _transaction(enabled: bool):
+        return transaction.atomic() if enabled else nullcontext()
+
+    def import_categories(self, categories: Iterable[dict]) -> None:
+        names = {int(category["id"]): category["name"] for category in categories}
+        if not names:
+            return
+        self._categories.update(names)
+        existing = set(
+            Category.objects.filter(id__in=names).values_list("id", flat=True)
+        )
+        created = Category.objects.bulk_create(
+            [
+                Category(id=category_id, name=name)
+                for category_id, name in names.items()
+                if category_id not in existing
+            ],
+            batch_size=self.batch_size,
+        )
+        if created:
+            bump_versions(CATEGORIES)
+        through = Category.shops.through
+        through.objects.bulk_create(
+            [
+                through(category_id=category_id, shop_id=self.shop.id)
+                for category_id in names
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+
+    def import_goods(self, batch: list[dict]) -> None:
+        self._check_duplicates(batch)
+        self.import_categories(
+            {
+                "id": item["category"],
+                "name": item["category_name"],
+            }
+            for item in batch
+            if "category_name" in item and int(item["category"]) not in self._categories
+        )
+        self._check_categories(batch)
+        products = self._resolve_names(
+            Product, self._products, {item["name"] for item in batch}
+        )
+        parameters = self._resolve_names(
+            Parameter,
+            self._parameters,
+            {name for item in batch for name in item.get("parameters", {})},
+        )
+        # Facet counts follow the offers of this batch and the offers of other
+        # shops that share its products, whose categories may get relinked.
+        affected = {
+            self._existing[int(item["id"])]
+            for item in batch
+            if int(item["id"]) in self._existing
+        }
+        affected.update(
+            ProductInfo.objects.filter(
+                product_id__in={products[item["name"]] for item in batch}
+            ).values_list("id", flat=True)
+        )
+        facets = offer_facets(affected)
+        relinked = self._link_categories(
+            {(products[item["name"]], int(item["category"])) for item in batch}
+        )
+
+        offers = [
+            (
+                ProductInfo(
+                    product_id=products[item["name"]],
+                    shop_id=self.shop.id,
+                    external_id=int(item["id"]),
+                    model=str(item.get("model", "")),
+                    price=int(item["price"]),
+                    price_rrc=int(item["price_rrc"]),
+                    quantity=int(item["quantity"]),
+                ),
+                item.get("parameters", {}),
+            )
+            for item in batch
+        ]
+        changed_ids = set()
+        offers = self._sync_existing(offers, parameters, changed_ids)
+        self._create_offers(offers, parameters)
+        changed_ids.update(info.id for info, _ in offers)
+        if relinked:
+            # Offers of other shops render the product categories too.
+            for info_id, shop_id in ProductInfo.objects.filter(
+                product_id__in=relinked
+            ).values_list("id", "shop_id"):
+                changed_ids.add(info_id)
+                if shop_id != self.shop.id:
+                    self._touched_shops.add(shop_id)
+        update_facets(facets, offer_facets(affected | changed_ids))
+        if changed_ids:
+            offers_changed.send(
+                sender=self.__class__, shop_id=self.shop.id, ids=changed_ids
+            )
+        self.stats.rows += len(batch)
+
+    def _create_offers(self, offers: list[tuple], parameters: dict[str, int]) -> None:
+        if not offers:
+            return
+        infos = [info for info, _ in offers]
+        ProductInfo.objects.bulk_create(infos, batch_size=self.batch_size)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            self._fetch_info_ids(infos)
+
+        product_parameters = [
+            ProductParameter(
+                product_info_id=info.id,
+                parameter_id=parameters[name],
+                value=str(value),
+            )
+            for info, values in offers
+            for name, value in values.items()
+        ]
+        ProductParameter.objects.bulk_create(
+            product_parameters, batch_size=self.batch_size
+        )
+
+        self.stats.created += len(infos)
+        self.stats.parameters += len(product_parameters)
+
+    def _sync_existing(
+        self, offers: list[tuple], parameters: dict[str, int], changed_ids: set[int]
+    ) -> list:
+        known = [
+            (info, values)
+            for info, values in offers
+            if info.external_id in self._existing
+        ]
+        if not known:
+            return offers
+        for info, _ in known:
+            info.id = self._existing.pop(info.external_id)
+
+        current = {
+            row[0]: row[1:]
+            for row in ProductInfo.objects.filter(
+                id__in=[info.id for info, _ in known]
+            ).values_list("id", *SYNC_FIELDS)
+        }
+        changed = [
+            info
+            for info, _ in known
+            if self.mode == REPLACE
+            or tuple(getattr(info, field) for field in SYNC_FIELDS) != current[info.id]
+        ]
+        ProductInfo.objects.bulk_update(
+            changed, SYNC_FIELDS, batch_size=self.batch_size
+        )
+        changed_ids.update(info.id for info in changed)
+        changed_ids.update(self._sync_parameters(known, parameters))
+
+        self.stats.updated += len(changed)
+        self.stats.unchanged += len(known) - len(changed)
+        return [(info, values) for info, values in offers if info.id is None]
+
+    def _sync_parameters(
+        self, known: list[tuple], parameters: dict[str, int]
+    ) -> set[int]:
+        current = {
+            (info_id, parameter_id): (pk, value)
+            for pk, info_id, parameter_id, value in ProductParameter.objects.filter(
+                product_info_id__in=[info.id for info, _ in known]
+            ).values_list("id", "product_info_id", "parameter_id", "value")
+        }
+        created, updated = [], []
+        changed_ids = set()
+        for info, values in known:
+            for name, value in values.items():
+                value = str(value)
+                row = current.pop((info.id, parameters[name]), None)
+                if row is None or row[1] != value:
+                    changed_ids.add(info.id)
+                if row is None:
+                    created.append(
+                        ProductParameter(
+                            product_info_id=info.id,
+                            parameter_id=parameters[name],
+                            value=value,
+                        )
+                    )
+                elif row[1] != value:
+                    updated.append(ProductParameter(id=row[0], value=value))
+
+        ProductParameter.objects.bulk_create(created, batch_size=self.batch_size)
+        ProductParameter.objects.bulk_update(
+            updated, ["value"], batch_size=self.batch_size
+        )
+        if current:
+            ProductParameter.objects.filter(
+                id__in=[pk for pk, _ in current.values()]
+            ).delete()
+        changed_ids.update(info_id for info_id, _ in current)
+        self.stats.parameters += len(created) + len(updated) + len(current)
+        return changed_ids
+
+    def _check_duplicates(self, batch: list[dict]) -> None:
+        for item in batch:
+            external_id = int(item["id"])
+            if external_id in self._seen:
+                raise FeedError(f"Повторяющийся id товара в прайсе: {external_id}")
+            self._seen.add(external_id)
+
+    def _check_categories(self, batch: list[dict]) -> None:
+        unknown = {int(item["category"]) for item in batch} - self._categories
+        if not unknown:
+            return
+        known = set(
+            Category.objects.filter(id__in=unknown).values_list("id", flat=True)
+        )
+        self._categories |= known
+        if unknown - known:
+            raise FeedError(
+                f"Неизвестные категории в прайсе: {sorted(unknown - known)}"
+            )
+
+    def _retire_missing(self) -> None:
+        # Retired offers drop out of the catalog, search and baskets but stay
+        # in the table, so placed orders and basket lines keep their offer.
+        ids = list(
+            ProductInfo.objects.filter(
+                id__in=list(self._existing.values()), active=True
+            ).values_list("id", flat=True)
+        )
+        for batch in chunked(ids, self.batch_size):
+            update_facets(offer_facets(batch), Counter())
+            ProductInfo.objects.filter(id__in=batch).update(active=False, quantity=0)
+            offers_removed.send(sender=self.__class__, shop_id=self.shop.id, ids=batch)
+        self.stats.deleted += len(ids)
+        self._existing = {}
+
+    def _resolve_names(self, model, cache: dict[str, int], names: set[str]) -> dict:
+        missing = names - cache.keys()
+        if missing:
+            if len(cache) > CACHE_LIMIT:
+                cache.clear()
+                missing = names
+            cache.update(
+                model.objects.filter(name__in=missing).values_list("name", "id")
+            )
+            new_objects = [model(name=name) for name in missing - cache.keys()]
+            model.objects.bulk_create(new_objects, batch_size=self.batch_size)
+            if connection.features.can_return_rows_from_bulk_insert:
+                cache.update((obj.name, obj.id) for obj in new_objects)
+            else:
+                cache.update(
+                    model.objects.filter(
+                        name__in=[obj.name for obj in new_objects]
+                    ).values_list("name", "id")
+                )
+        return cache
+
+    def _link_categories(self, pairs: set[tuple[int, int]]) -> set[int]:
+        pairs -= self._product_categories
+        if not pairs:
+            return set()
+        if len(self._product_categories) > CACHE_LIMIT:
+            self._product_categories = set()
+        through = Product.categories.through
+        new_pairs = pairs - set(
+            through.objects.filter(
+                product_id__in={product_id for product_id, _ in pairs}
+            ).values_list("product_id", "category_id")
+        )
+        through.objects.bulk_create(
+            [
+                through(product_id=product_id, category_id=category_id)
+                for product_id, category_id in new_pairs
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        self._product_categories |= pairs
+        return {product_id for product_id, _ in new_pairs}
+
+    def _fetch_info_ids(self, infos: list[ProductInfo]) -> None:
+        ids = dict(
+            ProductInfo.objects.filter(
+                shop_id=self.shop.id,
+                external_id__in=[info.external_id for info in infos],
+            ).values_list("external_id", "id")
+        )
+        for info in infos:
+            info.id = ids[info.external_id]
+
+
+def import_feed(
+    feed: Feed, user_id: int, mode: str = SYNC, **options
+) -> tuple[Shop, ImportStats]:
+    shop, _ = Shop.objects.get_or_create(name=feed.shop, user_id=user_id)
+    stats = CatalogImporter(shop, mode=mode, **options).run(feed.categories, feed.goods)
+    return shop, stats
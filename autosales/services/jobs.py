@@ -0,0 +1,214 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, F, Q
+from django.utils import timezone
+
+from autosales.models import ImportJob, Shop
+from .feeds import (
+    FetchedFeed,
+    count_rows,
+    detect_format,
+    download_feed,
+    open_feed,
+    read_feed,
+)
+from .importer import REPLACE, ImportStats, import_feed
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_import(
+    user_id: int, url: str, mode: str, feed_format: str = ""
+) -> ImportJob:
+    return ImportJob.objects.create(
+        user_id=user_id, url=url, mode=mode, feed_format=feed_format or ""
+    )
+
+
+def _alive(now: datetime) -> Q:
+    stale = now - timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+    return Q(state="running", heartbeat_at__gte=stale)
+
+
+def claim_job() -> ImportJob | None:
+    # A job is only claimed when no other job of the same partner is running,
+    # so imports into one shop never overlap. Running jobs without a recent
+    # heartbeat were left by a crashed worker and are claimed again.
+    now = timezone.now()
+    claimable = Q(state="queued") | (Q(state="running") & ~_alive(now))
+    busy = ImportJob.objects.filter(_alive(now), user_id=OuterRef("user_id"))
+    while True:
+        job_id = (
+            ImportJob.objects.filter(claimable)
+            .exclude(Exists(busy))
+            .order_by("created_at")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        claimed = (
+            ImportJob.objects.filter(claimable, id=job_id)
+            .exclude(Exists(busy))
+            .update(state="running", started_at=now, heartbeat_at=now)
+        )
+        if claimed:
+            return ImportJob.objects.get(id=job_id)
+
+
+def start_job(
+    user_id: int, url: str, mode: str, feed_format: str = ""
+) -> ImportJob | None:
+    # Claims the partner for an import run outside the queue, such as the
+    # import_feeds command. The job is inserted as running and withdrawn
+    # when another live job of the same partner exists.
+    now = timezone.now()
+    with transaction.atomic():
+        job = ImportJob.objects.create(
+            user_id=user_id,
+            url=url,
+            mode=mode,
+            feed_format=feed_format or "",
+            state="running",
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if (
+            ImportJob.objects.filter(_alive(now), user_id=user_id)
+            .exclude(id=job.id)
+            .exists()
+        ):
+            transaction.set_rollback(True)
+            return None
+    return job
+
+
+@contextmanager
+def _fetch_feed(source: str, **validators) -> Iterator[FetchedFeed]:
+    # Local paths only come from the import_feeds manifest and are read as is.
+    if urlparse(source).scheme in ("http", "https"):
+        with download_feed(source, **validators) as fetched:
+            yield fetched
+    else:
+        with open_feed(source) as stream:
+            yield FetchedFeed(stream)
+
+
+def _save_progress(job_id: int, values: dict) -> None:
+    ImportJob.objects.filter(id=job_id).update(**values)
+
+
+def run_job(job: ImportJob) -> ImportJob:
+    atomic = job.mode == REPLACE
+    with _progress_writer(atomic) as writer:
+        return _run_job(job, atomic, writer)
+
+
+@contextmanager
+def _progress_writer(atomic: bool) -> Iterator[ThreadPoolExecutor | None]:
+    # A replace import runs in one transaction, so its progress is written
+    # from another thread, on that thread's own connection, where it commits
+    # at once: the status endpoint shows it and claim_job sees the heartbeat.
+    # SQLite allows one writer: there the import holds the write lock, no
+    # worker can claim its job meanwhile, and progress shows on commit.
+    if not atomic or connection.vendor == "sqlite":
+        yield None
+        return
+    with ThreadPoolExecutor(1) as writer:
+        try:
+            yield writer
+        finally:
+            writer.submit(connection.close).result()
+
+
+def _run_job(
+    job: ImportJob, atomic: bool, writer: ThreadPoolExecutor | None
+) -> ImportJob:
+    def save_progress(stats: ImportStats) -> None:
+        job.processed = stats.rows
+        job.stats = stats.as_dict()
+        job.heartbeat_at = timezone.now()
+        values = {
+            "processed": job.processed,
+            "stats": job.stats,
+            "heartbeat_at": job.heartbeat_at,
+        }
+        if writer:
+            writer.submit(_save_progress, job.id, values).result()
+        else:
+            _save_progress(job.id, values)
+
+    known_shop = Shop.objects.filter(user_id=job.user_id, feed_url=job.url).first()
+    validators = {}
+    # A replace import rewrites every offer, so it runs even on an unchanged
+    # feed.
+    if known_shop and job.mode != REPLACE:
+        validators = {
+            "etag": known_shop.feed_etag,
+            "last_modified": known_shop.feed_last_modified,
+            "sha256": known_shop.feed_sha256,
+        }
+
+    job.processed = 0
+    try:
+        with _fetch_feed(job.url, **validators) as fetched:
+            if fetched.skipped:
+                shop, stats = known_shop, None
+            else:
+                feed_format = job.feed_format or detect_format(job.url)
+                job.total = count_rows(fetched.stream, feed_format)
+                job.heartbeat_at = timezone.now()
+                job.save(update_fields=["total", "heartbeat_at"])
+                shop, stats = import_feed(
+                    read_feed(fetched.stream, feed_format),
+                    job.user_id,
+                    mode=job.mode,
+                    atomic=atomic,
+                    progress=save_progress,
+                )
+    except Exception as error:
+        logger.exception("Import job %s failed", job.id)
+        # Sync imports commit batch by batch: once a batch is in, the catalog
+        # mixes old and new rows and the feed has to be imported again.
+        job.state = "partial" if job.processed and not atomic else "failed"
+        job.errors = str(error)
+    else:
+        job.state = "done"
+        job.shop = shop
+        job.skipped = fetched.skipped
+        if stats:
+            job.processed = stats.rows
+            job.total = stats.rows
+            job.stats = stats.as_dict()
+        if fetched.sha256:
+            job.stats["skip_ratio"] = _remember_feed(shop, job.url, fetched)
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def _remember_feed(shop: Shop, url: str, fetched: FetchedFeed) -> float:
+    Shop.objects.filter(id=shop.id).update(
+        feed_url=url,
+        feed_etag=fetched.etag,
+        feed_last_modified=fetched.last_modified,
+        feed_sha256=fetched.sha256,
+        feed_fetches=F("feed_fetches") + 1,
+        feed_skips=F("feed_skips") + int(fetched.skipped),
+    )
+    shop.refresh_from_db(fields=["feed_fetches", "feed_skips"])
+    logger.info(
+        "Feed %s for shop %s %s, skip ratio %s",
+        url,
+        shop.id,
+        "skipped" if fetched.skipped else "imported",
+        shop.feed_skip_ratio,
+    )
+    return shop.feed_skip_ratio
@@ -0,0 +1,86 @@
+import logging
+from typing import Iterable
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from autosales.models import Notification, Order
+from autosales.models.order import STATE_CHOICES
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+
+
+def queue_state_notifications(order_ids: Iterable[int], state: str) -> int:
+    # One query for the recipients and one INSERT for the batch; nothing is
+    # sent here.
+    label = dict(STATE_CHOICES)[state]
+    return len(
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    email=email,
+                    subject="Обновление статуса заказа",
+                    body=f"Заказ №{order_id}: {label}",
+                )
+                for order_id, email in Order.objects.filter(id__in=list(order_ids))
+                .order_by("id")
+                .values_list("id", "user__email")
+            ]
+        )
+    )
+
+
+def send_notifications(batch_size: int = BATCH_SIZE) -> tuple[int, int]:
+    # Sends the oldest pending notifications over one SMTP connection and
+    # returns how many were sent and how many failed. A failed message stays
+    # pending and is retried by later runs, up to MAX_ATTEMPTS times.
+    pending = list(
+        Notification.objects.filter(
+            sent_at__isnull=True, attempts__lt=MAX_ATTEMPTS
+        ).order_by("id")[:batch_size]
+    )
+    if not pending:
+        return 0, 0
+
+    sent, failed = [], {}
+    connection = get_connection()
+    try:
+        connection.open()
+        for notification in pending:
+            message = EmailMultiAlternatives(
+                notification.subject,
+                notification.body,
+                settings.EMAIL_HOST_USER,
+                [notification.email],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                logger.warning("Notification %s failed: %s", notification.id, error)
+                failed[notification.id] = str(error)
+            else:
+                sent.append(notification.id)
+    except Exception as error:
+        logger.exception("Sending notifications failed")
+        failed.update(
+            (notification.id, str(error))
+            for notification in pending
+            if notification.id not in sent
+        )
+    finally:
+        connection.close()
+
+    Notification.objects.filter(id__in=sent).update(
+        sent_at=timezone.now(), attempts=F("attempts") + 1, error=""
+    )
+    for notification_id, error in failed.items():
+        Notification.objects.filter(id=notification_id).update(
+            attempts=F("attempts") + 1, error=error
+        )
+    return len(sent), len(failed)
@@ -0,0 +1,174 @@
+from datetime import datetime, time, timedelta
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from autosales.models import Order, OrderItem, OrderShop, ProductInfo
+from autosales.models.order import STATE_CHOICES
+from .rollups import add_sales
+from .stock import StockShortage, reserve_stock, stock_shortages
+
+ORDER_STATES = {state for state, _ in STATE_CHOICES} - {"basket"}
+
+
+class OrderFilterError(ValueError):
+    pass
+
+
+class UnavailableItems(Exception):
+    def __init__(self, lines: list[dict]):
+        super().__init__("Товары больше не продаются, удалите их из корзины")
+        self.lines = lines
+
+
+def filter_orders(orders: QuerySet, query_params) -> QuerySet:
+    # ?state=new,sent&date_from=2024-01-01&date_to=2024-01-31; both bounds are
+    # inclusive, and a bare date_to includes the whole day. Without state,
+    # everything but the basket.
+    states = {state.strip() for state in query_params.get("state", "").split(",")} - {
+        ""
+    }
+    if states:
+        unknown = states - ORDER_STATES
+        if unknown:
+            raise OrderFilterError(f"Неверный state: {', '.join(sorted(unknown))}")
+        orders = orders.filter(state__in=states)
+    else:
+        orders = orders.exclude(state="basket")
+
+    for param in ("date_from", "date_to"):
+        value = query_params.get(param)
+        if value:
+            moment, whole_day = _parse_moment(value)
+            if moment is None:
+                raise OrderFilterError(f"Неверный {param}")
+            if param == "date_from":
+                orders = orders.filter(date_time__gte=moment)
+            elif whole_day:
+                orders = orders.filter(date_time__lt=moment + timedelta(days=1))
+            else:
+                orders = orders.filter(date_time__lte=moment)
+    return orders
+
+
+def _parse_moment(value: str) -> tuple[datetime | None, bool]:
+    # Returns the moment and whether the value was a bare date.
+    try:
+        day = parse_date(value)
+        if day is not None:
+            moment = datetime.combine(day, time.min)
+        else:
+            moment = parse_datetime(value)
+    except ValueError:
+        return None, False
+    if moment is None:
+        return None, False
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, day is not None
+
+
+def recalculate_totals(order_ids: Iterable[int]) -> int:
+    # One UPDATE with correlated subqueries over the order lines; callers run
+    # it inside the transaction that changed the lines. Placed orders are
+    # priced from their snapshots, baskets from the live catalog, where lines
+    # of retired offers no longer count.
+    lines = (
+        OrderItem.objects.filter(
+            Q(price__isnull=False) | Q(product_info__active=True),
+            order_id=OuterRef("id"),
+        )
+        .order_by()
+        .values("order_id")
+    )
+    return Order.objects.filter(id__in=list(order_ids)).update(
+        total_sum=Coalesce(
+            Subquery(
+                lines.annotate(
+                    total=Sum(F("quantity") * Coalesce("price", "product_info__price"))
+                ).values("total")
+            ),
+            0,
+        ),
+        items_count=Coalesce(
+            Subquery(lines.annotate(count=Sum("quantity")).values("count")), 0
+        ),
+    )
+
+
+def snapshot_items(order_ids: Iterable[int]) -> int:
+    # Lines that already carry a snapshot keep it.
+    offers = ProductInfo.objects.filter(id=OuterRef("product_info_id"))
+    return OrderItem.objects.filter(
+        order_id__in=list(order_ids), product_info__isnull=False, price__isnull=True
+    ).update(
+        price=Subquery(offers.values("price")),
+        product_name=Subquery(offers.values("product__name")),
+        model=Subquery(offers.values("model")),
+        shop_id=Subquery(offers.values("shop_id")),
+    )
+
+
+def link_shops(order_ids: Iterable[int]) -> int:
+    # Splits placed orders by shop with each shop's share of the snapshot
+    # totals; safe to re-run, existing rows are overwritten.
+    rows = (
+        OrderItem.objects.filter(order_id__in=list(order_ids), shop__isnull=False)
+        .values(
+            "order_id",
+            "shop_id",
+            state=F("order__state"),
+            date_time=F("order__date_time"),
+        )
+        .annotate(
+            total_sum=Sum(F("quantity") * Coalesce("price", "product_info__price")),
+            items_count=Sum("quantity"),
+        )
+        .order_by()
+    )
+    links = OrderShop.objects.bulk_create(
+        [OrderShop(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=["order", "shop"],
+        update_fields=["state", "date_time", "total_sum", "items_count"],
+    )
+    return len(links)
+
+
+def checkout_order(user_id: int, order_id: int, contact_id: int) -> bool:
+    # Totals are taken at current prices one last time and stay frozen once
+    # the order leaves the basket; date_time becomes the checkout time
+    # instead of the basket's creation. Raises UnavailableItems for lines
+    # whose offer was retired or deleted, and StockShortage with the short
+    # lines when stock cannot be reserved; nothing is changed in either case.
+    try:
+        with transaction.atomic():
+            unavailable = list(
+                OrderItem.objects.filter(
+                    Q(product_info__isnull=True) | Q(product_info__active=False),
+                    order_id=order_id,
+                    order__user_id=user_id,
+                    order__state="basket",
+                )
+                .order_by("id")
+                .values("id", "product_info")
+            )
+            if unavailable:
+                raise UnavailableItems(unavailable)
+            updated = Order.objects.filter(
+                user_id=user_id, id=order_id, state="basket"
+            ).update(contact_id=contact_id, state="new", date_time=timezone.now())
+            if updated:
+                reserve_stock(order_id)
+                snapshot_items([order_id])
+                recalculate_totals([order_id])
+                link_shops([order_id])
+                add_sales([order_id])
+    except StockShortage as error:
+        error.lines = stock_shortages(order_id)
+        raise
+    return bool(updated)
@@ -0,0 +1,180 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from autosales.models import OrderItem, OrderShop, SalesRollup, Shop
+
+# Shop parts of orders in these states count as sold.
+SOLD_STATES = ("new", "confirmed", "assembled", "sent", "delivered")
+
+
+def add_sales(order_ids: Iterable[int]) -> int:
+    # Adds the lines of newly placed orders to their rollup rows; called in
+    # the checkout transaction.
+    return _apply_sales(order_ids, None, 1)
+
+
+def remove_sales(order_ids: Iterable[int], shop_ids: Iterable[int]) -> int:
+    # Takes the given shops' lines of canceled orders back out.
+    return _apply_sales(order_ids, shop_ids, -1)
+
+
+def _apply_sales(
+    order_ids: Iterable[int], shop_ids: Iterable[int] | None, sign: int
+) -> int:
+    # Only the orders' own lines are read and their sums added to or taken
+    # from the existing rows; rebuild_rollups is the full recompute. The shop
+    # rows are locked, so concurrent updates of one shop apply one after
+    # another.
+    deltas = _sales_deltas(list(order_ids), shop_ids)
+    if not deltas:
+        return 0
+    shop_ids = sorted({shop_id for shop_id, _, _ in deltas})
+    with transaction.atomic():
+        list(Shop.objects.select_for_update().filter(id__in=shop_ids).values_list("id"))
+        rows = {
+            (row.shop_id, row.day, row.category_id): row
+            for row in SalesRollup.objects.filter(
+                shop_id__in=shop_ids, day__in={day for _, day, _ in deltas}
+            )
+        }
+        created, updated, emptied = [], [], []
+        for key, (units, revenue, orders) in deltas.items():
+            row = rows.get(key)
+            if row is None:
+                if sign > 0:
+                    shop_id, day, category_id = key
+                    created.append(
+                        SalesRollup(
+                            shop_id=shop_id,
+                            day=day,
+                            category_id=category_id,
+                            units=units,
+                            revenue=revenue,
+                            orders=len(orders),
+                        )
+                    )
+                continue
+            row.units = max(row.units + sign * units, 0)
+            row.revenue = max(row.revenue + sign * revenue, 0)
+            row.orders = max(row.orders + sign * len(orders), 0)
+            if row.orders:
+                updated.append(row)
+            else:
+                emptied.append(row.id)
+        SalesRollup.objects.bulk_create(created)
+        SalesRollup.objects.bulk_update(updated, ["units", "revenue", "orders"])
+        SalesRollup.objects.filter(id__in=emptied).delete()
+    return len(deltas)
+
+
+def _sales_deltas(
+    order_ids: list[int], shop_ids: Iterable[int] | None
+) -> dict[tuple, list]:
+    # {(shop, day, category): [units, revenue, order ids]}, with every line
+    # counted once in the totals row and once per category of its product.
+    parts = OrderShop.objects.filter(order_id__in=order_ids)
+    lines = OrderItem.objects.filter(order_id__in=order_ids, shop_id__isnull=False)
+    if shop_ids is not None:
+        parts = parts.filter(shop_id__in=list(shop_ids))
+        lines = lines.filter(shop_id__in=list(shop_ids))
+    days = {
+        (order_id, shop_id): timezone.localdate(moment)
+        for order_id, shop_id, moment in parts.values_list(
+            "order_id", "shop_id", "date_time"
+        )
+    }
+
+    deltas = defaultdict(lambda: [0, 0, set()])
+    counted = set()
+    for line_id, order_id, shop_id, quantity, price, category_id in lines.values_list(
+        "id",
+        "order_id",
+        "shop_id",
+        "quantity",
+        "price",
+        "product_info__product__categories",
+    ):
+        day = days.get((order_id, shop_id))
+        if day is None:
+            continue
+        keys = [(shop_id, day, category_id)] if category_id else []
+        if line_id not in counted:
+            counted.add(line_id)
+            keys.append((shop_id, day, None))
+        for key in keys:
+            delta = deltas[key]
+            delta[0] += quantity
+            delta[1] += quantity * (price or 0)
+            delta[2].add(order_id)
+    return deltas
+
+
+def rebuild_rollups(shop_id: int, days: Iterable[date]) -> int:
+    # Full recompute for the rebuild_sales_rollups command: one grouped query
+    # over the shop's lines of the given days replaces their rollup rows. The
+    # shop row is locked against concurrent checkouts of the shop.
+    days = sorted(set(days))
+    if not days:
+        return 0
+    with transaction.atomic():
+        list(Shop.objects.select_for_update().filter(id=shop_id).values_list("id"))
+        lines = OrderItem.objects.filter(
+            shop_id=shop_id,
+            order__shop_orders__shop_id=shop_id,
+            order__shop_orders__state__in=SOLD_STATES,
+            order__shop_orders__date_time__gte=_day_start(days[0]),
+            order__shop_orders__date_time__lt=_day_start(days[-1] + timedelta(1)),
+        )
+        totals = lines.values(day=F("order__shop_orders__date_time__date"))
+        by_category = lines.filter(
+            product_info__product__categories__isnull=False
+        ).values(
+            day=F("order__shop_orders__date_time__date"),
+            category_id=F("product_info__product__categories"),
+        )
+        rollups = [
+            SalesRollup(shop_id=shop_id, **row)
+            for rows in (totals, by_category)
+            for row in rows.annotate(
+                units=Sum("quantity"),
+                revenue=Coalesce(Sum(F("quantity") * F("price")), 0),
+                orders=Count("order_id", distinct=True),
+            ).order_by()
+            if row["day"] in days
+        ]
+        SalesRollup.objects.filter(shop_id=shop_id, day__in=days).delete()
+        SalesRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def sales_stats(
+    shop_ids: Iterable[int],
+    date_from: date | None = None,
+    date_to: date | None = None,
+    category_id: int | None = None,
+) -> list[dict]:
+    # Rows with an empty category are the day's totals; the category rows
+    # overlap for products in several categories.
+    rollups = SalesRollup.objects.filter(shop_id__in=list(shop_ids))
+    if date_from:
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(day__lte=date_to)
+    if category_id:
+        rollups = rollups.filter(category_id=category_id)
+    return [
+        {**row, "day": row["day"].isoformat()}
+        for row in rollups.order_by("day", "shop_id", "category_id").values(
+            "day", "shop", "category", "units", "revenue", "orders"
+        )
+    ]
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
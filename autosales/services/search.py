@@ -0,0 +1,133 @@
+import re
+from functools import cache
+
+from django.db import connection
+from django.db.models import Q
+
+from autosales.models import Product, ProductInfo, ProductParameter, Shop
+from .facets import filter_by_parameters, parameter_subqueries
+
+TABLE = "autosales_productsearch"
+INFO_TABLE = ProductInfo._meta.db_table
+PRODUCT_TABLE = Product._meta.db_table
+PARAMETER_TABLE = ProductParameter._meta.db_table
+CATEGORY_TABLE = Product.categories.through._meta.db_table
+SHOP_TABLE = Shop._meta.db_table
+WORD = re.compile(r"\w+")
+
+
+@cache
+def fts_available() -> bool:
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_index(**kwargs) -> None:
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "name, model, parameters, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def index_offers(ids) -> None:
+    if not fts_available() or not ids:
+        return
+    ids = list(ids)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({placeholders})", ids)
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, name, model, parameters) "
+            "SELECT info.id, product.name, info.model, "
+            "COALESCE(group_concat(parameter.value, ' '), '') "
+            f"FROM {INFO_TABLE} info "
+            f"JOIN {PRODUCT_TABLE} product ON product.id = info.product_id "
+            f"LEFT JOIN {PARAMETER_TABLE} parameter "
+            "ON parameter.product_info_id = info.id "
+            f"WHERE info.id IN ({placeholders}) AND info.active GROUP BY info.id",
+            ids,
+        )
+
+
+def unindex_offers(ids) -> None:
+    if not fts_available() or not ids:
+        return
+    ids = list(ids)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({placeholders})", ids)
+
+
+def match_expression(text: str) -> str:
+    return " ".join(f'"{word}"*' for word in WORD.findall(text))
+
+
+def search_offer_ids(
+    text: str,
+    limit: int,
+    offset: int,
+    shop_id: str | None = None,
+    category_id: str | None = None,
+    parameters: dict[str, list[str]] | None = None,
+) -> list[int]:
+    expression = match_expression(text)
+    if not expression:
+        return []
+    if not fts_available():
+        return scan_offer_ids(text, limit, offset, shop_id, category_id, parameters)
+
+    joins = ""
+    where = ""
+    params = [expression]
+    if category_id:
+        joins = (
+            f"JOIN {CATEGORY_TABLE} category "
+            "ON category.product_id = info.product_id AND category.category_id = %s "
+        )
+        params.insert(0, category_id)
+    if shop_id:
+        where = "AND info.shop_id = %s "
+        params.append(shop_id)
+    for subquery in parameter_subqueries(parameters or {}):
+        sql, subquery_params = subquery.query.sql_with_params()
+        where += f"AND info.id IN ({sql}) "
+        params.extend(subquery_params)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT info.id FROM {TABLE} "
+            f"JOIN {INFO_TABLE} info ON info.id = {TABLE}.rowid "
+            f"JOIN {SHOP_TABLE} shop ON shop.id = info.shop_id "
+            f"{joins}"
+            f"WHERE {TABLE} MATCH %s AND shop.state AND info.active {where}"
+            f"ORDER BY {TABLE}.rank, info.id LIMIT %s OFFSET %s",
+            [*params, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def scan_offer_ids(
+    text, limit, offset, shop_id, category_id, parameters=None
+) -> list[int]:
+    query = Q(shop__state=True, active=True)
+    if shop_id:
+        query &= Q(shop_id=shop_id)
+    if category_id:
+        query &= Q(product__categories__id=category_id)
+    for word in WORD.findall(text):
+        query &= (
+            Q(product__name__icontains=word)
+            | Q(model__icontains=word)
+            | Q(product_parameters__value__icontains=word)
+        )
+    return list(
+        filter_by_parameters(ProductInfo.objects.filter(query), parameters or {})
+        .order_by("id")
+        .values_list("id", flat=True)
+        .distinct()[offset : offset + limit]
+    )
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case,
+    F,
+    PositiveIntegerField,
+    Sum,
+    Value,
+    When,
+)
+from django.utils import timezone
+
+from autosales.models import (
+    OrderItem,
+    ProductInfo,
+    StockReservation,
+)
+from .catalog import refresh_entries
+from .versions import bump_shops
+
+
+class StockShortage(Exception):
+    def __init__(self, lines: list[dict] | None = None):
+        super().__init__("Недостаточно товара на складе")
+        self.lines = lines or []
+
+
+def _per_offer(quantities: dict[int, int]) -> Case:
+    return Case(
+        *(When(id=info_id, then=Value(q)) for info_id, q in quantities.items()),
+        output_field=PositiveIntegerField(),
+    )
+
+
+def reserve_stock(order_id: int) -> int:
+    # Runs inside the checkout transaction. Each shop's lines are taken by one
+    # conditional UPDATE that only touches offers with enough stock, so no row
+    # is locked in advance; a short shop rolls back the whole checkout. The
+    # reservations expire after RESERVATION_TTL unless the shop confirms its
+    # part first (see release_expired).
+    lines = defaultdict(dict)
+    for info_id, shop_id, quantity in OrderItem.objects.filter(
+        order_id=order_id, product_info__isnull=False
+    ).values_list("product_info_id", "product_info__shop_id", "quantity"):
+        lines[shop_id][info_id] = quantity
+
+    for quantities in lines.values():
+        reserved = ProductInfo.objects.filter(
+            id__in=quantities, quantity__gte=_per_offer(quantities)
+        ).update(quantity=F("quantity") - _per_offer(quantities))
+        if reserved != len(quantities):
+            raise StockShortage()
+
+    expires_at = timezone.now() + timedelta(seconds=settings.RESERVATION_TTL)
+    StockReservation.objects.bulk_create(
+        [
+            StockReservation(
+                order_id=order_id,
+                product_info_id=info_id,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for quantities in lines.values()
+            for info_id, quantity in quantities.items()
+        ]
+    )
+    _touch_catalog(lines)
+    return sum(len(quantities) for quantities in lines.values())
+
+
+def stock_shortages(order_id: int) -> list[dict]:
+    return [
+        {"product_info": info_id, "requested": quantity, "available": available}
+        for info_id, quantity, available in OrderItem.objects.filter(
+            order_id=order_id, quantity__gt=F("product_info__quantity")
+        ).values_list("product_info_id", "quantity", "product_info__quantity")
+    ]
+
+
+def release_reservations(
+    order_ids: Iterable[int], shop_ids: Iterable[int] | None = None
+) -> int:
+    # Returns the reserved stock of the given orders, or of their lines from
+    # shop_ids only, to the offers.
+    reservations = StockReservation.objects.filter(order_id__in=list(order_ids))
+    if shop_ids is not None:
+        reservations = reservations.filter(product_info__shop_id__in=list(shop_ids))
+    totals = dict(
+        reservations.values("product_info_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_info_id", "total")
+    )
+    if totals:
+        ProductInfo.objects.filter(id__in=totals).update(
+            quantity=F("quantity") + _per_offer(totals)
+        )
+        lines = defaultdict(dict)
+        for info_id, shop_id in ProductInfo.objects.filter(id__in=totals).values_list(
+            "id", "shop_id"
+        ):
+            lines[shop_id][info_id] = totals[info_id]
+        _touch_catalog(lines)
+    reservations.delete()
+    return sum(totals.values())
+
+
+def consume_reservations(
+    order_ids: Iterable[int], shop_ids: Iterable[int] | None = None
+) -> int:
+    # Delivered goods keep the stock they took; only the records go.
+    reservations = StockReservation.objects.filter(order_id__in=list(order_ids))
+    if shop_ids is not None:
+        reservations = reservations.filter(product_info__shop_id__in=list(shop_ids))
+    return reservations.delete()[0]
+
+
+def _touch_catalog(lines: dict[int, dict[int, int]]) -> None:
+    # Runs after the commit, so the catalog rows and version counters are not
+    # written under the checkout's lock. The listings show quantity, so the
+    # whole catalog's version moves with the shops' on every stock change.
+    if not lines:
+        return
+    ids = [info_id for quantities in lines.values() for info_id in quantities]
+    shop_ids = list(lines)
+
+    def touch() -> None:
+        refresh_entries(ids)
+        bump_shops(*shop_ids)
+
+    transaction.on_commit(touch)
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from autosales.models import Order, OrderShop, Shop, StockReservation
+from autosales.models.order import STATE_CHOICES
+from .notifications import queue_state_notifications
+from .rollups import remove_sales
+from .stock import consume_reservations, release_reservations
+
+# Order states a partner may move their part of an order to, by current
+# state. Baskets never reach partners; delivered and canceled are final.
+ORDER_TRANSITIONS = {
+    "new": {"confirmed", "canceled"},
+    "confirmed": {"assembled", "canceled"},
+    "assembled": {"sent", "canceled"},
+    "sent": {"delivered"},
+    "delivered": set(),
+    "canceled": set(),
+}
+
+
+# Progress order of the states; an order is as far as its slowest shop.
+STATE_RANK = {state: rank for rank, (state, _) in enumerate(STATE_CHOICES)}
+
+
+class TransitionError(ValueError):
+    pass
+
+
+def transition_orders(
+    user_id: int, order_ids: Iterable[int], state: str
+) -> tuple[list[int], list[dict]]:
+    # Moves the partner's part of each order to state. Orders are checked
+    # against ORDER_TRANSITIONS in memory and the accepted ones are written
+    # with one UPDATE; the orders' own state is then derived from all their
+    # shops, and customers are notified in the same transaction. Returns the
+    # changed order ids and the errors.
+    if state not in ORDER_TRANSITIONS:
+        raise TransitionError(f"Неверный state: {state}")
+    order_ids = list(dict.fromkeys(order_ids))
+
+    with transaction.atomic():
+        current = defaultdict(set)
+        for order_id, order_state in (
+            OrderShop.objects.select_for_update()
+            .filter(shop__user_id=user_id, order_id__in=order_ids)
+            .values_list("order_id", "state")
+        ):
+            current[order_id].add(order_state)
+
+        accepted, errors = [], []
+        for order_id in order_ids:
+            states = current.get(order_id)
+            if not states:
+                errors.append({"id": order_id, "Error": "Заказ не найден"})
+            elif any(state not in ORDER_TRANSITIONS[old] for old in states):
+                errors.append(
+                    {
+                        "id": order_id,
+                        "Error": "Недопустимый переход: "
+                        f"{', '.join(sorted(states))} -> {state}",
+                    }
+                )
+            else:
+                accepted.append(order_id)
+
+        if accepted:
+            shop_ids = list(
+                Shop.objects.filter(user_id=user_id).values_list("id", flat=True)
+            )
+            _move_parts(accepted, shop_ids, state)
+    return accepted, errors
+
+
+def release_expired(batch_size: int = 1000) -> tuple[int, int]:
+    # Shop parts of orders still "new" when their reservations expire are
+    # canceled and their stock is returned, as if the shop had canceled them;
+    # confirmed parts keep their stock. Reservations left on delivered or
+    # canceled orders are dropped. Returns the orders touched and the units
+    # returned.
+    now = timezone.now()
+    with transaction.atomic():
+        StockReservation.objects.filter(
+            order__state__in=("delivered", "canceled")
+        ).delete()
+        expired = StockReservation.objects.filter(
+            expires_at__lte=now,
+            order__shop_orders__shop_id=F("product_info__shop_id"),
+            order__shop_orders__state="new",
+        )
+        order_ids = list(
+            expired.order_by("order_id")
+            .values_list("order_id", flat=True)
+            .distinct()[:batch_size]
+        )
+        expired = set(
+            expired.filter(order_id__in=order_ids).values_list(
+                "order_id", "product_info__shop_id"
+            )
+        )
+        parts = defaultdict(list)
+        for order_id, shop_id in (
+            OrderShop.objects.select_for_update()
+            .filter(order_id__in=order_ids, state="new")
+            .values_list("order_id", "shop_id")
+        ):
+            if (order_id, shop_id) in expired:
+                parts[shop_id].append(order_id)
+        units = sum(
+            _move_parts(ids, [shop_id], "canceled") for shop_id, ids in parts.items()
+        )
+    return len(order_ids), units
+
+
+def _move_parts(order_ids: list[int], shop_ids: list[int], state: str) -> int:
+    # Writes state to the shops' parts of the orders and derives the orders'
+    # own state; returns the units of stock given back on cancel.
+    OrderShop.objects.filter(shop_id__in=shop_ids, order_id__in=order_ids).update(
+        state=state
+    )
+    _sync_order_states(order_ids)
+    if state == "canceled":
+        remove_sales(order_ids, shop_ids)
+        return release_reservations(order_ids, shop_ids)
+    if state == "delivered":
+        consume_reservations(order_ids, shop_ids)
+    return 0
+
+
+def _sync_order_states(order_ids: list[int]) -> None:
+    # An order is canceled only when every shop canceled its part; otherwise
+    # it takes the least advanced state of the remaining shops, and its
+    # totals are those of the remaining shops. Customers are notified of the
+    # orders whose own state changed.
+    current = dict(Order.objects.filter(id__in=order_ids).values_list("id", "state"))
+    shop_states = defaultdict(set)
+    for order_id, state in OrderShop.objects.filter(order_id__in=order_ids).values_list(
+        "order_id", "state"
+    ):
+        shop_states[order_id].add(state)
+
+    by_state = defaultdict(list)
+    partly_canceled = []
+    for order_id, states in shop_states.items():
+        remaining = states - {"canceled"}
+        if remaining:
+            by_state[min(remaining, key=STATE_RANK.__getitem__)].append(order_id)
+            if "canceled" in states:
+                partly_canceled.append(order_id)
+        else:
+            by_state["canceled"].append(order_id)
+    for state, ids in by_state.items():
+        Order.objects.filter(id__in=ids).update(state=state)
+        changed = [order_id for order_id in ids if current.get(order_id) != state]
+        if changed:
+            queue_state_notifications(changed, state)
+
+    if partly_canceled:
+        remaining = (
+            OrderShop.objects.filter(order_id=OuterRef("id"))
+            .exclude(state="canceled")
+            .order_by()
+            .values("order_id")
+        )
+        Order.objects.filter(id__in=partly_canceled).update(
+            total_sum=Subquery(
+                remaining.annotate(total=Sum("total_sum")).values("total")
+            ),
+            items_count=Subquery(
+                remaining.annotate(count=Sum("items_count")).values("count")
+            ),
+        )
@@ -0,0 +1,30 @@
+from django.db.models import F
+
+from autosales.models import CatalogVersion
+
+CATALOG = "catalog"
+CATEGORIES = "categories"
+SHOPS = "shops"
+
+
+def shop_key(shop_id: int) -> str:
+    return f"shop:{shop_id}"
+
+
+def bump_versions(*keys: str) -> None:
+    CatalogVersion.objects.bulk_create(
+        [CatalogVersion(key=key) for key in keys], ignore_conflicts=True
+    )
+    CatalogVersion.objects.filter(key__in=keys).update(value=F("value") + 1)
+
+
+def bump_shops(*shop_ids: int) -> None:
+    bump_versions(CATALOG, *(shop_key(shop_id) for shop_id in shop_ids))
+
+
+def get_versions(*keys: str) -> dict[str, int]:
+    versions = dict.fromkeys(keys, 0)
+    versions.update(
+        CatalogVersion.objects.filter(key__in=keys).values_list("key", "value")
+    )
+    return versions
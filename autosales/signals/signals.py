@@ -2,16 +2,26 @@ from typing import Type
 
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
 from django_rest_passwordreset.signals import reset_password_token_created
 
-from autosales.models import ConfirmEmailToken, User
+from autosales.models import Category, ConfirmEmailToken, Shop, User
+from autosales.services.basket import refresh_basket_totals
+from autosales.services.catalog import refresh_entries, remove_entries
+from autosales.services.search import index_offers, unindex_offers
+from autosales.services.versions import CATEGORIES, SHOPS, bump_versions
 
 new_user_registered = Signal()
 
 new_order = Signal()
 
+offers_changed = Signal()
+
+offers_removed = Signal()
+
+catalog_imported = Signal()
+
 
 @receiver(reset_password_token_created)
 def password_reset_token_created(sender, instance, reset_password_token, **kwargs):
@@ -53,3 +63,29 @@ def new_order_signal(user_id, **kwargs):
         [user.email],
     )
     msg.send()
+
+
+@receiver(offers_changed)
+def offers_changed_signal(shop_id, ids, **kwargs):
+    index_offers(ids)
+    refresh_entries(ids)
+    refresh_basket_totals(ids)
+
+
+@receiver(offers_removed)
+def offers_removed_signal(shop_id, ids, **kwargs):
+    unindex_offers(ids)
+    remove_entries(ids)
+    refresh_basket_totals(ids)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed_signal(**kwargs):
+    bump_versions(CATEGORIES)
+
+
+@receiver(post_save, sender=Shop)
+@receiver(post_delete, sender=Shop)
+def shop_changed_signal(**kwargs):
+    bump_versions(SHOPS)
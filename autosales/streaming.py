@@ -0,0 +1,75 @@
+import re
+from typing import Iterable, Iterator
+
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from ujson import dumps as dump_json
+
+CHUNK_SIZE = 500
+BUFFER_SIZE = 64 * 1024
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+
+def json_chunks(
+    rows: Iterable[dict], buffer_size: int = BUFFER_SIZE
+) -> Iterator[bytes]:
+    # Same compact, non-ASCII output as DRF's JSONRenderer, written as one
+    # array and flushed every buffer_size bytes. Like the renderer, U+2028 and
+    # U+2029 are escaped, which ujson leaves as they are.
+    buffer = bytearray(b"[")
+    separator = b""
+    for row in rows:
+        buffer += separator
+        buffer += _escape_separators(
+            dump_json(row, ensure_ascii=False, escape_forward_slashes=False)
+        ).encode()
+        separator = b","
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+def _escape_separators(text: str) -> str:
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+
+def text_chunks(
+    lines: Iterable[str], buffer_size: int = BUFFER_SIZE
+) -> Iterator[bytes]:
+    buffer = bytearray()
+    for line in lines:
+        buffer += line.encode()
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def stream_json(request, rows: Iterable[dict], gzip: bool = True):
+    response = StreamingHttpResponse(json_chunks(rows), content_type="application/json")
+    return _encode(request, response, gzip)
+
+
+def stream_text(
+    request,
+    lines: Iterable[str],
+    content_type: str,
+    filename: str | None = None,
+    gzip: bool = True,
+):
+    response = StreamingHttpResponse(text_chunks(lines), content_type=content_type)
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return _encode(request, response, gzip)
+
+
+def _encode(request, response: StreamingHttpResponse, gzip: bool):
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if gzip and ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+        response.streaming_content = compress_sequence(response.streaming_content)
+        response["Content-Encoding"] = "gzip"
+    return response
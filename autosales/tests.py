@@ -1,3 +1,705 @@
-from django.test import TestCase
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from datetime import timedelta
+from tempfile import NamedTemporaryFile
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError, connections
+from django.db.models import Sum
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from ujson import dumps as dump_json
+
+from autosales.management.commands.run_import_jobs import _work
+from autosales.models import (
+    Category,
+    Contact,
+    IdempotencyKey,
+    ImportJob,
+    Notification,
+    Order,
+    OrderItem,
+    OrderShop,
+    Product,
+    ProductFacet,
+    ProductInfo,
+    SalesRollup,
+    Shop,
+    StockReservation,
+    User,
+)
+from autosales.serializers import (
+    OrderHistorySerializer,
+    OrderSerializer,
+    serialize_orders,
+)
+from autosales.services import (
+    CATALOG,
+    Feed,
+    REPLACE,
+    SYNC,
+    StockShortage,
+    TransitionError,
+    add_basket_items,
+    checkout_order,
+    claim_job,
+    enqueue_import,
+    get_versions,
+    import_feed,
+    rebuild_facets,
+    rebuild_rollups,
+    search_offer_ids,
+    release_expired,
+    run_job,
+    transition_orders,
+)
+from autosales.services.idempotency import claim_key, store_response
+from autosales.services.search import fts_available
+from autosales.signals.signals import offers_changed
+from autosales.streaming import json_chunks
+from autosales.views.basket import BasketView
+from autosales.views.product import ProductInfoView
+
+
+class OrdersTestCase(TransactionTestCase):
+    def setUp(self):
+        self.partners = [
+            User.objects.create(
+                email=f"shop{index}@example.com", username=f"shop{index}", type="shop"
+            )
+            for index in range(2)
+        ]
+        self.shops = [
+            Shop.objects.create(name=f"Магазин {index}", user=partner, state=True)
+            for index, partner in enumerate(self.partners)
+        ]
+        self.category = Category.objects.create(name="Шины")
+        self.category.shops.set(self.shops)
+        self.product = Product.objects.create(name="Шина")
+        self.product.categories.add(self.category)
+        self.offers = [
+            ProductInfo.objects.create(
+                product=self.product,
+                shop=shop,
+                external_id=index + 1,
+                model="R16",
+                quantity=5,
+                price=100 * (index + 1),
+                price_rrc=150 * (index + 1),
+            )
+            for index, shop in enumerate(self.shops)
+        ]
+
+    def make_basket(self, name: str, quantities: dict[int, int]) -> Order:
+        buyer = User.objects.create(
+            email=f"{name}@example.com", username=name, type="buyer"
+        )
+        contact = Contact.objects.create(
+            user=buyer, city="Москва", street="Тверская", phone="+79990000000"
+        )
+        basket = Order.objects.create(user=buyer, state="basket", contact=contact)
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=basket, product_info=self.offers[index], quantity=quantity
+                )
+                for index, quantity in quantities.items()
+            ]
+        )
+        return basket
+
+    def checkout(self, basket: Order) -> bool:
+        return checkout_order(basket.user_id, basket.id, basket.contact_id)
+
+
+class CheckoutTests(OrdersTestCase):
+    def test_concurrent_checkouts_do_not_oversell(self):
+        baskets = [self.make_basket(f"buyer{index}", {0: 1}) for index in range(12)]
+
+        def checkout(basket):
+            try:
+                return self.checkout(basket)
+            except StockShortage:
+                return False
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(4) as executor:
+            placed = sum(executor.map(checkout, baskets))
+
+        self.assertEqual(placed, 5)
+        self.offers[0].refresh_from_db()
+        self.assertEqual(self.offers[0].quantity, 0)
+        self.assertEqual(
+            StockReservation.objects.aggregate(total=Sum("quantity"))["total"], 5
+        )
+        self.assertEqual(Order.objects.filter(state="new").count(), 5)
+
+    def test_shortage_leaves_basket_and_stock_unchanged(self):
+        basket = self.make_basket("buyer", {0: 2, 1: 6})
+
+        with self.assertRaises(StockShortage) as raised:
+            self.checkout(basket)
+
+        self.assertEqual(
+            [line["product_info"] for line in raised.exception.lines],
+            [self.offers[1].id],
+        )
+        basket.refresh_from_db()
+        self.assertEqual(basket.state, "basket")
+        self.assertEqual(
+            list(ProductInfo.objects.order_by("id").values_list("quantity", flat=True)),
+            [5, 5],
+        )
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_expired_reservations_return_stock_of_unconfirmed_orders(self):
+        basket = self.make_basket("buyer", {0: 2, 1: 3})
+        self.checkout(basket)
+        self.assertEqual(release_expired(), (0, 0))
+
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(1))
+        self.assertEqual(release_expired(), (1, 5))
+
+        basket.refresh_from_db()
+        self.assertEqual(basket.state, "canceled")
+        self.assertEqual(
+            list(ProductInfo.objects.order_by("id").values_list("quantity", flat=True)),
+            [5, 5],
+        )
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_confirmed_parts_keep_their_reservations(self):
+        basket = self.make_basket("buyer", {0: 2, 1: 3})
+        self.checkout(basket)
+        transition_orders(self.partners[0].id, [basket.id], "confirmed")
+
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(1))
+        self.assertEqual(release_expired(), (1, 3))
+
+        basket.refresh_from_db()
+        self.assertEqual(basket.state, "confirmed")
+        self.assertEqual(
+            list(ProductInfo.objects.order_by("id").values_list("quantity", flat=True)),
+            [3, 5],
+        )
+        self.assertEqual(release_expired(), (0, 0))
+
+    def test_stock_changes_move_catalog_version(self):
+        before = get_versions(CATALOG)[CATALOG]
+        basket = self.make_basket("buyer", {0: 1})
+        self.checkout(basket)
+        after_checkout = get_versions(CATALOG)[CATALOG]
+        self.assertGreater(after_checkout, before)
+
+        transition_orders(self.partners[0].id, [basket.id], "canceled")
+        self.assertGreater(get_versions(CATALOG)[CATALOG], after_checkout)
+
+
+class TransitionTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = self.make_basket("buyer", {0: 2, 1: 1})
+        self.checkout(self.order)
+
+    def test_partial_cancel_keeps_order_and_recomputes_totals(self):
+        accepted, errors = transition_orders(
+            self.partners[0].id, [self.order.id], "canceled"
+        )
+
+        self.assertEqual((accepted, errors), ([self.order.id], []))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, "new")
+        self.assertEqual((self.order.total_sum, self.order.items_count), (200, 1))
+        self.offers[0].refresh_from_db()
+        self.assertEqual(self.offers[0].quantity, 5)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_order_follows_slowest_shop(self):
+        transition_orders(self.partners[0].id, [self.order.id], "confirmed")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, "new")
+        self.assertFalse(Notification.objects.exists())
+
+        transition_orders(self.partners[1].id, [self.order.id], "confirmed")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, "confirmed")
+        self.assertEqual(
+            list(Notification.objects.values_list("email", "body")),
+            [("buyer@example.com", f"Заказ №{self.order.id}: Подтвержден")],
+        )
+
+    def test_order_canceled_when_every_shop_cancels(self):
+        for partner in self.partners:
+            transition_orders(partner.id, [self.order.id], "canceled")
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, "canceled")
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(
+            list(Notification.objects.values_list("body", flat=True)),
+            [f"Заказ №{self.order.id}: Отменен"],
+        )
+
+    def test_invalid_transitions_are_rejected(self):
+        accepted, errors = transition_orders(
+            self.partners[0].id, [self.order.id], "delivered"
+        )
+
+        self.assertEqual(accepted, [])
+        self.assertEqual([error["id"] for error in errors], [self.order.id])
+        self.assertEqual(
+            OrderShop.objects.get(order=self.order, shop=self.shops[0]).state, "new"
+        )
+        with self.assertRaises(TransitionError):
+            transition_orders(self.partners[0].id, [self.order.id], "basket")
+
+
+class RollupTests(OrdersTestCase):
+    @staticmethod
+    def rollups() -> list[tuple]:
+        return sorted(
+            SalesRollup.objects.values_list(
+                "shop_id", "day", "category_id", "units", "revenue", "orders"
+            ),
+            key=str,
+        )
+
+    def rebuild(self) -> list[tuple]:
+        days = set(SalesRollup.objects.values_list("day", flat=True))
+        for shop in self.shops:
+            rebuild_rollups(shop.id, days)
+        return self.rollups()
+
+    def test_incremental_rollups_match_rebuild(self):
+        first = self.make_basket("first", {0: 2, 1: 1})
+        second = self.make_basket("second", {0: 1})
+        self.checkout(first)
+        self.checkout(second)
+        transition_orders(self.partners[0].id, [first.id], "canceled")
+
+        incremental = self.rollups()
+        self.assertEqual(incremental, self.rebuild())
+        totals = [row for row in incremental if row[2] is None]
+        self.assertEqual(
+            sorted(
+                (shop_id, units, revenue, orders)
+                for shop_id, _, _, units, revenue, orders in totals
+            ),
+            [(self.shops[0].id, 1, 100, 1), (self.shops[1].id, 1, 200, 1)],
+        )
+
+    def test_cancel_of_whole_shop_day_empties_its_rows(self):
+        basket = self.make_basket("buyer", {1: 2})
+        self.checkout(basket)
+        transition_orders(self.partners[1].id, [basket.id], "canceled")
+
+        self.assertEqual(self.rollups(), [])
+        self.assertEqual(self.rebuild(), [])
+
+
+class SerializerParityTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        # DRF's JSONRenderer escapes the JavaScript line separators.
+        self.product.name = "Шина\u2028«Зима»\u2029/R16"
+        self.product.save()
+        self.basket = self.make_basket("buyer", {0: 1, 1: 2})
+        self.order = self.make_basket("other", {0: 1})
+        self.checkout(self.order)
+
+    def assertSameJson(self, rows, serializer):
+        expected = JSONRenderer().render(serializer.data)
+        self.assertEqual(JSONRenderer().render(rows), expected)
+        self.assertEqual(b"".join(json_chunks(rows, buffer_size=64)), expected)
+
+    def test_basket(self):
+        baskets = Order.objects.filter(id=self.basket.id)
+        self.assertSameJson(
+            serialize_orders(baskets), OrderSerializer(baskets, many=True)
+        )
+
+    def test_history(self):
+        orders = Order.objects.filter(id=self.order.id)
+        self.assertSameJson(
+            serialize_orders(orders, history=True),
+            OrderHistorySerializer(orders, many=True),
+        )
+
+    def test_line_separators_are_escaped(self):
+        rows = [{"name": self.product.name}]
+        chunks = b"".join(json_chunks(rows))
+        self.assertEqual(chunks, JSONRenderer().render(rows))
+        self.assertNotIn("\u2028".encode(), chunks)
+
+
+def feed_goods(quantities: dict[int, int]) -> list[dict]:
+    return [
+        {
+            "id": external_id,
+            "category": 1,
+            "name": f"Шина {external_id}",
+            "model": "R16",
+            "price": 100 * external_id,
+            "price_rrc": 150 * external_id,
+            "quantity": quantity,
+            "parameters": {"Сезон": "Зима" if external_id % 2 else "Лето"},
+        }
+        for external_id, quantity in quantities.items()
+    ]
+
+
+class ImporterTests(TransactionTestCase):
+    def setUp(self):
+        self.partner = User.objects.create(
+            email="shop@example.com", username="shop", type="shop"
+        )
+        self.changed = set()
+
+        def collect(ids, **kwargs):
+            self.changed.update(ids)
+
+        offers_changed.connect(collect, weak=False, dispatch_uid="tests")
+        self.addCleanup(offers_changed.disconnect, dispatch_uid="tests")
+
+    def sync(self, quantities: dict[int, int]):
+        self.changed.clear()
+        feed = Feed(
+            shop="Магазин",
+            categories=[{"id": 1, "name": "Шины"}],
+            goods=iter(feed_goods(quantities)),
+        )
+        return import_feed(feed, self.partner.id, mode=SYNC, batch_size=2)
+
+    @staticmethod
+    def facets() -> list[tuple]:
+        return sorted(
+            ProductFacet.objects.filter(count__gt=0).values_list(
+                "category_id", "parameter_id", "value", "count"
+            ),
+            key=str,
+        )
+
+    def test_sync_updates_changed_rows_and_retires_missing_ones(self):
+        shop, _ = self.sync({1: 5, 2: 3, 3: 1})
+        offers = dict(
+            ProductInfo.objects.filter(shop=shop).values_list("external_id", "id")
+        )
+
+        _, stats = self.sync({1: 5, 2: 4})
+
+        self.assertEqual(
+            (stats.created, stats.updated, stats.unchanged, stats.deleted),
+            (0, 1, 1, 1),
+        )
+        self.assertEqual(self.changed, {offers[2]})
+        self.assertEqual(
+            dict(
+                ProductInfo.objects.filter(shop=shop).values_list("external_id", "id")
+            ),
+            offers,
+        )
+        self.assertEqual(
+            sorted(
+                ProductInfo.objects.filter(shop=shop).values_list(
+                    "external_id", "active", "quantity"
+                )
+            ),
+            [(1, True, 5), (2, True, 4), (3, False, 0)],
+        )
+
+    def test_facets_follow_sync_imports(self):
+        shop, _ = self.sync({1: 5, 2: 3, 3: 1})
+        self.sync({1: 5, 2: 4, 4: 2})
+        self.sync({2: 4, 4: 2, 5: 1})
+
+        incremental = self.facets()
+        rebuild_facets(shop.id)
+        self.assertEqual(incremental, self.facets())
+        self.assertIn((None, mock.ANY, "Лето", 2), incremental)
+        self.assertIn((None, mock.ANY, "Зима", 1), incremental)
+
+    def test_retired_offer_comes_back(self):
+        shop, _ = self.sync({1: 5, 2: 3})
+        self.sync({1: 5})
+        _, stats = self.sync({1: 5, 2: 2})
+
+        self.assertEqual((stats.created, stats.updated), (0, 1))
+        self.assertEqual(ProductInfo.objects.get(shop=shop, external_id=2).quantity, 2)
+        self.assertTrue(ProductInfo.objects.get(shop=shop, external_id=2).active)
+
+
+class ImportJobTests(TransactionTestCase):
+    def setUp(self):
+        self.partners = [
+            User.objects.create(
+                email=f"shop{index}@example.com", username=f"shop{index}", type="shop"
+            )
+            for index in range(2)
+        ]
+
+    def write_feed(self, goods: list[dict]) -> str:
+        feed = NamedTemporaryFile("w", suffix=".jsonl", delete=False)
+        self.addCleanup(os.remove, feed.name)
+        with feed:
+            feed.write(
+                dump_json(
+                    {"shop": "Магазин", "categories": [{"id": 1, "name": "Шины"}]}
+                )
+            )
+            feed.writelines(f"\n{dump_json(item)}" for item in goods)
+        return feed.name
+
+    def test_queued_jobs_wait_for_a_live_job_of_the_partner(self):
+        first = enqueue_import(self.partners[0].id, "first.jsonl", SYNC)
+        second = enqueue_import(self.partners[0].id, "second.jsonl", SYNC)
+        other = enqueue_import(self.partners[1].id, "other.jsonl", SYNC)
+
+        self.assertEqual(claim_job().id, first.id)
+        self.assertEqual(claim_job().id, other.id)
+        self.assertIsNone(claim_job())
+
+        ImportJob.objects.filter(id=first.id).update(state="done")
+        self.assertEqual(claim_job().id, second.id)
+
+    def test_stale_running_job_is_claimed_again(self):
+        job = enqueue_import(self.partners[0].id, "feed.jsonl", SYNC)
+        self.assertEqual(claim_job().id, job.id)
+        self.assertIsNone(claim_job())
+
+        with override_settings(IMPORT_JOB_STALE_AFTER=0):
+            ImportJob.objects.filter(id=job.id).update(
+                heartbeat_at=timezone.now() - timedelta(seconds=1)
+            )
+            reclaimed = claim_job()
+
+        self.assertEqual(reclaimed.id, job.id)
+        self.assertEqual(reclaimed.state, "running")
+        self.assertIsNone(claim_job())
+
+    def test_replace_job_reports_progress_and_finishes(self):
+        url = self.write_feed(feed_goods({1: 5, 2: 3, 3: 1}))
+        job = enqueue_import(self.partners[0].id, url, REPLACE, "jsonl")
+        job = run_job(claim_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, "done")
+        self.assertEqual((job.processed, job.total), (3, 3))
+        self.assertIsNotNone(job.heartbeat_at)
+        self.assertIsNone(claim_job())
+
+    def test_worker_survives_database_errors(self):
+        job = enqueue_import(self.partners[0].id, "feed.jsonl", SYNC)
+        claims = [OperationalError("database is locked"), job, None]
+        with (
+            mock.patch(
+                "autosales.management.commands.run_import_jobs.claim_job",
+                side_effect=claims,
+            ),
+            mock.patch("autosales.management.commands.run_import_jobs.run_job") as run,
+            self.assertLogs("autosales.management.commands.run_import_jobs", "ERROR"),
+        ):
+            _work(once=True, interval=0)
+
+        run.assert_called_once_with(job)
+
+
+class BasketTests(OrdersTestCase):
+    def test_concurrent_additions_add_up(self):
+        basket = self.make_basket("buyer", {})
+
+        def add(quantity):
+            try:
+                return add_basket_items(basket.id, {self.offers[0].id: quantity})
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(add, [1, 2, 3, 4, 5, 6]))
+
+        line = OrderItem.objects.get(order=basket)
+        self.assertEqual(line.quantity, 21)
+        basket.refresh_from_db()
+        self.assertEqual((basket.total_sum, basket.items_count), (2100, 21))
+
+
+class IdempotencyTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.basket = self.make_basket("buyer", {})
+        self.buyer = self.basket.user
+        self.view = BasketView.as_view({"post": "create"})
+
+    def add(self, quantity: int, key: str = "key-1"):
+        request = APIRequestFactory().post(
+            "/basket",
+            {
+                "items": dump_json(
+                    [{"product_info": self.offers[0].id, "quantity": quantity}]
+                )
+            },
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+        force_authenticate(request, self.buyer)
+        return self.view(request)
+
+    def quantity(self) -> int:
+        return OrderItem.objects.get(order=self.basket).quantity
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.add(1)
+        retry = self.add(1)
+
+        self.assertEqual((retry.status_code, retry.data), (200, first.data))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(self.quantity(), 1)
+        self.add(1, key="key-2")
+        self.assertEqual(self.quantity(), 2)
+
+    def test_key_reused_for_another_payload_is_rejected(self):
+        self.add(1)
+        response = self.add(2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.quantity(), 1)
+
+    def test_duplicate_of_a_running_request_is_refused(self):
+        duplicates = []
+
+        def add_items(order_id, lines):
+            duplicates.append(self.add(1))
+            return add_basket_items(order_id, lines)
+
+        with mock.patch(
+            "autosales.views.basket.add_basket_items", side_effect=add_items
+        ):
+            first = self.add(1)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(duplicates[0].status_code, 409)
+        self.assertEqual(self.quantity(), 1)
+
+    def test_expired_lock_is_taken_over_once(self):
+        past = timezone.now() - timedelta(seconds=1)
+        future = timezone.now() + timedelta(minutes=5)
+        self.assertIsNone(claim_key(self.buyer.id, "key-1", "sha", past))
+
+        self.assertIsNone(claim_key(self.buyer.id, "key-1", "sha", future))
+        self.assertIsNotNone(claim_key(self.buyer.id, "key-1", "sha", future))
+
+        # The first holder finishing late leaves the new holder's key alone.
+        store_response(self.buyer.id, "key-1", past, 200, {"Status": True})
+        self.assertIsNone(IdempotencyKey.objects.get().status_code)
+        store_response(self.buyer.id, "key-1", future, 201, {"Status": True})
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+
+class CatalogTests(TransactionTestCase):
+    def setUp(self):
+        caches[settings.CATALOG_CACHE].clear()
+        if fts_available():
+            call_command("rebuild_search_index", stdout=StringIO())
+        self.partner = User.objects.create(
+            email="shop@example.com", username="shop", type="shop"
+        )
+        self.shop, _ = self.sync({1: 5, 2: 3, 3: 1, 4: 2})
+        self.offers = dict(
+            ProductInfo.objects.filter(shop=self.shop).values_list("external_id", "id")
+        )
+
+    def sync(self, quantities: dict[int, int]):
+        feed = Feed(
+            shop="Магазин",
+            categories=[{"id": 1, "name": "Шины"}],
+            goods=iter(feed_goods(quantities)),
+        )
+        return import_feed(feed, self.partner.id, mode=SYNC)
+
+    def get(self, etag: str = "", **params):
+        request = APIRequestFactory().get("/products", params)
+        if etag:
+            request.META["HTTP_IF_NONE_MATCH"] = etag
+        return ProductInfoView.as_view()(request)
+
+    def quantities(self, response) -> dict[int, int]:
+        return {row["id"]: row["quantity"] for row in response.data["results"]}
+
+    def test_repeat_get_is_not_modified(self):
+        first = self.get()
+        self.assertEqual((first.status_code, first["X-Cache"]), (200, "MISS"))
+
+        repeat = self.get(first["ETag"])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat["ETag"], first["ETag"])
+        self.assertEqual(self.get()["X-Cache"], "HIT")
+
+    def test_checkout_changes_the_etag(self):
+        first = self.get()
+        shop_first = self.get(shop_id=str(self.shop.id))
+        buyer = User.objects.create(
+            email="buyer@example.com", username="buyer", type="buyer"
+        )
+        contact = Contact.objects.create(
+            user=buyer, city="Москва", street="Тверская", phone="+79990000000"
+        )
+        basket = Order.objects.create(user=buyer, state="basket", contact=contact)
+        OrderItem.objects.create(
+            order=basket, product_info_id=self.offers[1], quantity=2
+        )
+        checkout_order(buyer.id, basket.id, contact.id)
+
+        for before, params in (
+            (first, {}),
+            (shop_first, {"shop_id": str(self.shop.id)}),
+        ):
+            after = self.get(before["ETag"], **params)
+            self.assertEqual(after.status_code, 200)
+            self.assertNotEqual(after["ETag"], before["ETag"])
+            self.assertEqual(self.quantities(after)[self.offers[1]], 3)
+
+    def test_import_changes_the_etag(self):
+        first = self.get()
+        self.sync({1: 5, 2: 3, 3: 1, 4: 7})
+
+        after = self.get(first["ETag"])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(self.quantities(after)[self.offers[4]], 7)
+
+    def test_search_matches_names_and_parameters(self):
+        self.assertEqual(
+            sorted(search_offer_ids("зим", 10, 0)), [self.offers[1], self.offers[3]]
+        )
+        self.assertEqual(search_offer_ids("шина 2", 10, 0), [self.offers[2]])
+        response = self.get(search="Зима", shop_id=str(self.shop.id))
+        self.assertEqual(
+            sorted(self.quantities(response)), [self.offers[1], self.offers[3]]
+        )
+
+        self.sync({1: 5, 2: 3, 4: 2})
+        self.assertEqual(search_offer_ids("зима", 10, 0), [self.offers[1]])
+
+    def test_facets_count_the_catalog_and_filtered_results(self):
+        self.assertEqual(
+            self.get().data["facets"],
+            {"Сезон": [{"value": "Зима", "count": 2}, {"value": "Лето", "count": 2}]},
+        )
+
+        filtered = self.get(**{"param[Сезон]": "Зима"})
+        self.assertEqual(
+            sorted(self.quantities(filtered)), [self.offers[1], self.offers[3]]
+        )
+        self.assertEqual(
+            filtered.data["facets"], {"Сезон": [{"value": "Зима", "count": 2}]}
+        )
+
+        self.sync({1: 5, 2: 3, 3: 1})
+        self.assertEqual(
+            self.get().data["facets"],
+            {"Сезон": [{"value": "Зима", "count": 2}, {"value": "Лето", "count": 1}]},
+        )
@@ -3,8 +3,13 @@ __all__ = (
     "OrderView",
     "PartnerState",
     "PartnerOrders",
+    "PartnerOrderState",
+    "PartnerOrderExport",
+    "PartnerStats",
     "PartnerUpdate",
+    "PartnerUpdateStatus",
     "ProductInfoView",
+    "CatalogCacheStats",
     "ShopView",
     "CategoryView",
     "RegisterAccountView",
@@ -13,12 +18,20 @@ __all__ = (
     "ContactView",
     "LoginAccount",
 )
-from basket import BasketView
-from order import OrderView
-from partner import PartnerState, PartnerOrders, PartnerUpdate
-from product import ProductInfoView
-from shop import ShopView, CategoryView
-from user import (
+from .basket import BasketView
+from .order import OrderView
+from .partner import (
+    PartnerState,
+    PartnerOrders,
+    PartnerOrderState,
+    PartnerOrderExport,
+    PartnerStats,
+    PartnerUpdate,
+    PartnerUpdateStatus,
+)
+from .product import ProductInfoView, CatalogCacheStats
+from .shop import ShopView, CategoryView
+from .user import (
     RegisterAccountView,
     ConfirmAccountView,
     AccountDetails,
@@ -1,39 +1,44 @@
 from django.db import IntegrityError
-from django.db.models import Sum, F, Q
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework import status
 from ujson import loads as load_json
 
-from autosales.models import Order, OrderItem
-from autosales.serializers import OrderSerializer, OrderItemSerializer
+from autosales.models import Order
+from autosales.serializers import OrderSerializer, serialize_orders
+from autosales.services import (
+    add_basket_items,
+    idempotent,
+    remove_basket_items,
+    update_basket_quantities,
+    validate_basket_items,
+)
 
 
 class BasketView(ModelViewSet):
+    fast_serialization = True
+
     def list(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return Response(
                 {"Status": False, "Error": "Log in required"},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        basket = (
-            Order.objects.filter(user_id=request.user.id, state="basket")
-            .prefetch_related(
-                "ordered_items__product_info__product__category",
+        basket = Order.objects.filter(user_id=request.user.id, state="basket")
+        if self.fast_serialization:
+            return Response(serialize_orders(basket), status=status.HTTP_200_OK)
+
+        serializer = OrderSerializer(
+            basket.prefetch_related(
+                "ordered_items__product_info__product__categories",
                 "ordered_items__product_info__product_parameters__parameter",
-            )
-            .annotate(
-                total_sum=Sum(
-                    F("ordered_items__quantity")
-                    * F("ordered_items__product_info__price")
-                )
-            )
-            .distinct()
+            ),
+            many=True,
         )
-        serializer = OrderSerializer(basket, many=True)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return Response(
@@ -53,21 +58,14 @@ class BasketView(ModelViewSet):
                 basket, _ = Order.objects.get_or_create(
                     user_id=request.user.id, state="basket"
                 )
-                objects_created = 0
-                for order_item in items_dict:
-                    order_item.update({"order": basket.id})
-                    serializer = OrderItemSerializer(data=order_item)
-                    if serializer.is_valid():
-                        try:
-                            serializer.save()
-                        except IntegrityError as error:
-                            return Response({"Status": False, "Errors": str(error)})
-                        else:
-                            objects_created += 1
+                lines, errors = validate_basket_items(items_dict, basket.id)
+                if errors:
+                    return Response({"Status": False, "Errors": errors})
 
-                    else:
-
-                        return Response({"Status": False, "Errors": serializer.errors})
+                try:
+                    objects_created = add_basket_items(basket.id, lines)
+                except IntegrityError as error:
+                    return Response({"Status": False, "Errors": str(error)})
 
                 return Response(
                     {"Status": True, "Создано объектов": objects_created},
@@ -78,6 +76,7 @@ class BasketView(ModelViewSet):
             status=status.HTTP_403_FORBIDDEN,
         )
 
+    @idempotent
     def update(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return Response(
@@ -98,22 +97,22 @@ class BasketView(ModelViewSet):
                 basket, _ = Order.objects.get_or_create(
                     user_id=request.user.id, state="basket"
                 )
-                objects_updated = 0
-                for order_item in items_dict:
-                    if (
-                        type(order_item["id"]) == int
-                        and type(order_item["quantity"]) == int
-                    ):
-                        objects_updated += OrderItem.objects.filter(
-                            order_id=basket.id, id=order_item["id"]
-                        ).update(quantity=order_item["quantity"])
-
-                return Response({"Status": True, "Обновлено объектов": objects_updated})
+                objects_updated, results = update_basket_quantities(
+                    basket.id, items_dict
+                )
+                return Response(
+                    {
+                        "Status": True,
+                        "Обновлено объектов": objects_updated,
+                        "Позиции": results,
+                    }
+                )
         return Response(
             {"Status": False, "Errors": "Не указаны все необходимые аргументы"},
             status=status.HTTP_403_FORBIDDEN,
         )
 
+    @idempotent
     def destroy(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return Response(
@@ -127,15 +126,14 @@ class BasketView(ModelViewSet):
             basket, _ = Order.objects.get_or_create(
                 user_id=request.user.id, state="basket"
             )
-            query = Q()
-            objects_deleted = False
-            for order_item_id in items_list:
-                if order_item_id.isdigit():
-                    query = query | Q(order_id=basket.id, id=order_item_id)
-                    objects_deleted = True
+            item_ids = [
+                int(order_item_id)
+                for order_item_id in items_list
+                if order_item_id.isdigit()
+            ]
 
-            if objects_deleted:
-                deleted_count = OrderItem.objects.filter(query).delete()[0]
+            if item_ids:
+                deleted_count = remove_basket_items(basket.id, item_ids)
                 return Response(
                     {"Status": True, "Удалено объектов": deleted_count},
                     status=status.HTTP_200_OK,
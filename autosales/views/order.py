@@ -1,41 +1,60 @@
 from django.db import IntegrityError
-from django.db.models import Sum, F
 from rest_framework import status
 from rest_framework.generics import ListAPIView, CreateAPIView
 from rest_framework.response import Response
 
 from autosales.models import Order
-from autosales.serializers import OrderSerializer
+from autosales.pagination import OrderCursorPagination
+from autosales.serializers import (
+    ORDER_FIELDS,
+    OrderHistorySerializer,
+    iter_orders,
+    serialize_order_rows,
+)
+from autosales.services import (
+    OrderFilterError,
+    StockShortage,
+    UnavailableItems,
+    checkout_order,
+    filter_orders,
+    idempotent,
+)
 from autosales.signals.signals import new_user_registered, new_order
+from autosales.streaming import stream_json
 
 
 class OrderView(ListAPIView, CreateAPIView):
+    pagination_class = OrderCursorPagination
+    fast_serialization = True
+
     def list(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return Response(
                 {"Status": False, "Error": "Log in required"},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        order = (
-            Order.objects.filter(user_id=request.user.id)
-            .exclude(state="basket")
-            .prefetch_related(
-                "ordered_items__product_info__product__category",
-                "ordered_items__product_info__product_parameters__parameter",
+        try:
+            order = filter_orders(
+                Order.objects.filter(user_id=request.user.id), request.query_params
             )
-            .select_related("contact")
-            .annotate(
-                total_sum=Sum(
-                    F("ordered_items__quantity")
-                    * F("ordered_items__product_info__price")
-                )
+        except OrderFilterError as error:
+            return Response({"Status": False, "Errors": str(error)})
+
+        if request.query_params.get("stream"):
+            # Unpaginated export of the whole filtered history.
+            return stream_json(
+                request, iter_orders(order.order_by("-date_time", "-id"), history=True)
             )
-            .distinct()
-        )
+        if self.fast_serialization:
+            page = self.paginate_queryset(order.values(*ORDER_FIELDS))
+            return self.get_paginated_response(serialize_order_rows(page, history=True))
 
-        serializer = OrderSerializer(order, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        page = self.paginate_queryset(
+            order.prefetch_related("ordered_items").select_related("contact")
+        )
+        return self.get_paginated_response(OrderHistorySerializer(page, many=True).data)
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return Response(
@@ -46,15 +65,20 @@ class OrderView(ListAPIView, CreateAPIView):
         if {"id", "contact"}.issubset(request.data):
             if request.data["id"].isdigit():
                 try:
-                    is_updated = Order.objects.filter(
-                        user_id=request.user.id, id=request.data["id"]
-                    ).update(contact_id=request.data["contact"], state="new")
+                    is_updated = checkout_order(
+                        request.user.id, request.data["id"], request.data["contact"]
+                    )
                 except IntegrityError as error:
                     print(error)
                     return Response(
                         {"Status": False, "Errors": "Неправильно указаны аргументы"},
                         status=status.HTTP_403_FORBIDDEN,
                     )
+                except (StockShortage, UnavailableItems) as error:
+                    return Response(
+                        {"Status": False, "Errors": str(error), "Позиции": error.lines},
+                        status=status.HTTP_409_CONFLICT,
+                    )
                 else:
                     if is_updated:
                         new_order.send(sender=self.__class__, user_id=request.user.id)
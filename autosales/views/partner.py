@@ -1,23 +1,41 @@
 from distutils.util import strtobool
 
 from django.core.validators import URLValidator
-from django.db.models import Sum, F
-from requests import get
+from django.utils.dateparse import parse_date
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import CreateAPIView, RetrieveAPIView, ListAPIView
 from rest_framework.response import Response
 
-from autosales.models import (
-    Category,
-    ProductInfo,
-    Product,
-    Shop,
-    Parameter,
-    ProductParameter,
-    Order,
+from autosales.models import Shop, OrderShop, ImportJob
+from autosales.pagination import OrderCursorPagination
+from autosales.serializers import (
+    SHOP_ORDER_FIELDS,
+    ShopSerializer,
+    ShopOrderSerializer,
+    ImportJobSerializer,
+    serialize_shop_order_rows,
+    iter_shop_orders,
 )
-from autosales.serializers import ShopSerializer, OrderSerializer
+from autosales.services import (
+    EXPORT_FORMATS,
+    FORMATS,
+    MODES,
+    SHOPS,
+    SYNC,
+    OrderFilterError,
+    TransitionError,
+    bump_shops,
+    bump_versions,
+    enqueue_import,
+    export_lines,
+    export_rows,
+    filter_orders,
+    sales_stats,
+    set_shops_active,
+    transition_orders,
+)
+from autosales.streaming import stream_json, stream_text
 
 
 class PartnerUpdate(CreateAPIView):
@@ -31,6 +49,16 @@ class PartnerUpdate(CreateAPIView):
             )
 
         url = request.data.get("url")
+        mode = request.data.get("mode", SYNC)
+        if mode not in MODES:
+            return Response(
+                {"Status": False, "Errors": f"Неизвестный режим импорта: {mode}"}
+            )
+        feed_format = request.data.get("format")
+        if feed_format and feed_format not in FORMATS:
+            return Response(
+                {"Status": False, "Errors": f"Неизвестный формат: {feed_format}"}
+            )
         if url:
             validate_url = URLValidator()
             try:
@@ -38,49 +66,43 @@ class PartnerUpdate(CreateAPIView):
             except ValidationError as e:
                 return Response({"Status": False, "Error": str(e)})
             else:
-                stream = get(url).content
-
-                data = load_yaml(stream, Loader=Loader)
-
-                shop, _ = Shop.objects.get_or_create(
-                    name=data["shop"], user_id=request.user.id
+                job = enqueue_import(request.user.id, url, mode, feed_format)
+                return Response(
+                    {"Status": True, "Job": job.id},
+                    status=status.HTTP_202_ACCEPTED,
                 )
-                for category in data["categories"]:
-                    category_object, _ = Category.objects.get_or_create(
-                        id=category["id"], name=category["name"]
-                    )
-                    category_object.shops.add(shop.id)
-                    category_object.save()
-                ProductInfo.objects.filter(shop_id=shop.id).delete()
-                for item in data["goods"]:
-                    product, _ = Product.objects.get_or_create(
-                        name=item["name"], category_id=item["category"]
-                    )
-
-                    product_info = ProductInfo.objects.create(
-                        product_id=product.id,
-                        external_id=item["id"],
-                        model=item["model"],
-                        price=item["price"],
-                        price_rrc=item["price_rrc"],
-                        quantity=item["quantity"],
-                        shop_id=shop.id,
-                    )
-                    for name, value in item["parameters"].items():
-                        parameter_object, _ = Parameter.objects.get_or_create(name=name)
-                        ProductParameter.objects.create(
-                            product_info_id=product_info.id,
-                            parameter_id=parameter_object.id,
-                            value=value,
-                        )
-
-                return Response({"Status": True})
 
         return Response(
             {"Status": False, "Errors": "Не указаны все необходимые аргументы"}
         )
 
 
+class PartnerUpdateStatus(RetrieveAPIView):
+    def retrieve(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return Response(
+                {"Status": False, "Error": "Log in required"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if request.user.type != "shop":
+            return Response(
+                {"Status": False, "Error": "Только для магазинов"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        job = ImportJob.objects.filter(
+            id=kwargs["job_id"], user_id=request.user.id
+        ).first()
+        if not job:
+            return Response(
+                {"Status": False, "Errors": "Задача импорта не найдена"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        serializer = ImportJobSerializer(job)
+        return Response(serializer.data)
+
+
 class PartnerState(CreateAPIView, RetrieveAPIView):
     def retrieve(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -114,9 +136,13 @@ class PartnerState(CreateAPIView, RetrieveAPIView):
         state = request.data.get("state")
         if state:
             try:
-                Shop.objects.filter(user_id=request.user.id).update(
-                    state=strtobool(state)
-                )
+                shops = Shop.objects.filter(user_id=request.user.id)
+                shop_ids = list(shops.values_list("id", flat=True))
+                active = bool(strtobool(state))
+                shops.update(state=active)
+                set_shops_active(shop_ids, active)
+                bump_shops(*shop_ids)
+                bump_versions(SHOPS)
                 return Response({"Status": True})
             except ValueError as error:
                 return Response({"Status": False, "Errors": str(error)})
@@ -127,6 +153,9 @@ class PartnerState(CreateAPIView, RetrieveAPIView):
 
 
 class PartnerOrders(ListAPIView):
+    pagination_class = OrderCursorPagination
+    fast_serialization = True
+
     def list(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return Response(
@@ -140,24 +169,146 @@ class PartnerOrders(ListAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        order = (
-            Order.objects.filter(
-                ordered_items__product_info__shop__user_id=request.user.id
+        try:
+            links = filter_orders(
+                OrderShop.objects.filter(shop__user_id=request.user.id),
+                request.query_params,
             )
-            .exclude(state="basket")
-            .prefetch_related(
-                "ordered_items__product_info__product__category",
-                "ordered_items__product_info__product_parameters__parameter",
+        except OrderFilterError as error:
+            return Response({"Status": False, "Errors": str(error)})
+
+        if request.query_params.get("stream"):
+            return stream_json(
+                request, iter_shop_orders(links.order_by("-date_time", "-id"))
             )
-            .select_related("contact")
-            .annotate(
-                total_sum=Sum(
-                    F("ordered_items__quantity")
-                    * F("ordered_items__product_info__price")
-                )
+        if self.fast_serialization:
+            page = self.paginate_queryset(links.values(*SHOP_ORDER_FIELDS))
+            return self.get_paginated_response(serialize_shop_order_rows(page))
+
+        page = self.paginate_queryset(
+            links.select_related("order__contact").prefetch_related(
+                "order__ordered_items"
+            )
+        )
+        return self.get_paginated_response(ShopOrderSerializer(page, many=True).data)
+
+
+class PartnerOrderExport(RetrieveAPIView):
+    def retrieve(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return Response(
+                {"Status": False, "Error": "Log in required"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if request.user.type != "shop":
+            return Response(
+                {"Status": False, "Error": "Только для магазинов"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        # Not "format", which DRF reserves for renderer selection.
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"Status": False, "Errors": "Неверный export_format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            links = filter_orders(
+                OrderShop.objects.filter(shop__user_id=request.user.id),
+                request.query_params,
             )
-            .distinct()
+        except OrderFilterError as error:
+            return Response({"Status": False, "Errors": str(error)})
+
+        return stream_text(
+            request,
+            export_lines(export_rows(links.order_by("date_time", "id")), export_format),
+            EXPORT_FORMATS[export_format],
+            filename=f"orders.{export_format}",
+        )
+
+
+class PartnerStats(RetrieveAPIView):
+    def retrieve(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return Response(
+                {"Status": False, "Error": "Log in required"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if request.user.type != "shop":
+            return Response(
+                {"Status": False, "Error": "Только для магазинов"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        filters = {}
+        for param in ("date_from", "date_to"):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    filters[param] = parse_date(value)
+                except ValueError:
+                    filters[param] = None
+                if filters[param] is None:
+                    return Response({"Status": False, "Errors": f"Неверный {param}"})
+        category_id = request.query_params.get("category_id")
+        if category_id:
+            if not category_id.isdigit():
+                return Response({"Status": False, "Errors": "Неверный category_id"})
+            filters["category_id"] = int(category_id)
+
+        shop_ids = Shop.objects.filter(user_id=request.user.id).values_list(
+            "id", flat=True
         )
+        return Response(sales_stats(shop_ids, **filters))
 
-        serializer = OrderSerializer(order, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class PartnerOrderState(CreateAPIView):
+    def create(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return Response(
+                {"Status": False, "Error": "Log in required"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if request.user.type != "shop":
+            return Response(
+                {"Status": False, "Error": "Только для магазинов"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        orders = request.data.get("orders")
+        state = request.data.get("state")
+        if orders and state:
+            if isinstance(orders, str):
+                orders = orders.split(",")
+            order_ids = [
+                int(order_id) for order_id in orders if str(order_id).strip().isdigit()
+            ]
+            if not order_ids:
+                return Response(
+                    {"Status": False, "Errors": "Неверный список заказов"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            try:
+                updated, errors = transition_orders(request.user.id, order_ids, state)
+            except TransitionError as error:
+                return Response(
+                    {"Status": False, "Errors": str(error)},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return Response(
+                {
+                    "Status": True,
+                    "Обновлено объектов": len(updated),
+                    "Ошибки": errors,
+                }
+            )
+
+        return Response(
+            {"Status": False, "Errors": "Не указаны все необходимые аргументы"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
@@ -1,28 +1,119 @@
-from rest_framework.generics import ListAPIView
-from django.db.models import Q
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from autosales.models import ProductInfo
-from autosales.serializers import ProductInfoSerializer
+from autosales.models import CatalogEntry
+from autosales.pagination import CatalogCursorPagination, SearchPagination
+from autosales.services import (
+    CATALOG,
+    cache_key,
+    cache_stats,
+    catalog_entries,
+    filter_by_parameters,
+    get_cached,
+    get_facets,
+    make_etag,
+    not_modified,
+    parameter_filters,
+    search_offer_ids,
+    set_cached,
+    shop_key,
+)
+from autosales.streaming import CHUNK_SIZE, stream_json
+
+# Facets of a search are counted over at most this many best matches.
+FACET_SCAN_LIMIT = 10_000
 
 
 class ProductInfoView(ListAPIView):
+    pagination_class = CatalogCursorPagination
+
     def list(self, request, *args, **kwargs):
-        query = Q(shop__state=True)
         shop_id = request.query_params.get("shop_id")
         category_id = request.query_params.get("category_id")
+        search = request.query_params.get("search")
+        parameters = parameter_filters(request.query_params)
 
+        version_key = CATALOG
         if shop_id:
-            query = query & Q(shop_id=shop_id)
-        if category_id:
-            query = query & Q(category_id=category_id)
-
-        queryset = (
-            ProductInfo.objects.filter(query)
-            .select_related("shop", "product__category")
-            .prefetch_related("product_parameters__parameter")
-            .distinct()
+            if not shop_id.isdigit():
+                return Response({"Status": False, "Errors": "Неверный shop_id"})
+            version_key = shop_key(shop_id)
+        if category_id and not category_id.isdigit():
+            return Response({"Status": False, "Errors": "Неверный category_id"})
+
+        key = cache_key(request, "products", version_key)
+        etag = make_etag(key)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        if request.query_params.get("stream") and not search:
+            # Unpaginated export of the whole result set, without facets.
+            entries = filter_by_parameters(
+                catalog_entries(shop_id, category_id), parameters, field="offer_id"
+            ).order_by("offer_id")
+            response = stream_json(
+                request,
+                entries.values_list("payload", flat=True).iterator(
+                    chunk_size=CHUNK_SIZE
+                ),
+            )
+            response["ETag"] = etag
+            return response
+
+        data = get_cached(key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT", "ETag": etag})
+
+        offer_ids = None
+        if search:
+            response = self._search(request, search, shop_id, category_id, parameters)
+            offer_ids = search_offer_ids(
+                search,
+                FACET_SCAN_LIMIT,
+                0,
+                shop_id=shop_id,
+                category_id=category_id,
+                parameters=parameters,
+            )
+        else:
+            entries = filter_by_parameters(
+                catalog_entries(shop_id, category_id), parameters, field="offer_id"
+            )
+            page = self.paginate_queryset(entries)
+            response = self.get_paginated_response([entry.payload for entry in page])
+            if parameters:
+                offer_ids = entries.values("offer_id")
+        # Unfiltered pages use the counts the importer keeps per shop and
+        # category; filtered and searched ones count their own result set.
+        response.data["facets"] = get_facets(shop_id, category_id, offer_ids)
+        set_cached(key, response.data)
+        response["X-Cache"] = "MISS"
+        response["ETag"] = etag
+        return response
+
+    def _search(self, request, search, shop_id, category_id, parameters):
+        paginator = SearchPagination()
+        ids = paginator.paginate_ids(
+            request,
+            lambda limit, offset: search_offer_ids(
+                search,
+                limit,
+                offset,
+                shop_id=shop_id,
+                category_id=category_id,
+                parameters=parameters,
+            ),
+        )
+        entries = CatalogEntry.objects.only("offer_id", "payload").in_bulk(ids)
+        return paginator.get_paginated_response(
+            [entries[offer_id].payload for offer_id in ids if offer_id in entries]
         )
-        serializer = ProductInfoSerializer(queryset, many=True)
 
-        return Response(serializer.data)
+
+class CatalogCacheStats(RetrieveAPIView):
+    permission_classes = [IsAdminUser]
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(cache_stats())
@@ -2,13 +2,32 @@ from rest_framework.generics import ListAPIView
 
 from autosales.models import Category, Shop
 from autosales.serializers import CategorySerializer, ShopSerializer
+from autosales.services import (
+    CATEGORIES,
+    SHOPS,
+    cache_key,
+    make_etag,
+    not_modified,
+)
 
 
 class CategoryView(ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    def list(self, request, *args, **kwargs):
+        etag = make_etag(cache_key(request, "categories", CATEGORIES))
+        response = not_modified(request, etag) or super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
 
 class ShopView(ListAPIView):
     queryset = Shop.objects.all()
     serializer_class = ShopSerializer
+
+    def list(self, request, *args, **kwargs):
+        etag = make_etag(cache_key(request, "shops", SHOPS))
+        response = not_modified(request, etag) or super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
@@ -82,6 +82,13 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # A file rather than the in-memory default, so the concurrent
+        # checkout tests wait on the lock like the real database does.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -122,6 +129,61 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Catalog listings are cached in CATALOG_CACHE. Use a shared backend (Redis,
+# Memcached, FileBasedCache) when running several processes.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog",
+        "TIMEOUT": 600,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+CATALOG_CACHE = "catalog"
+
+# Catalog pagination
+
+CATALOG_PAGE_SIZE = 50
+
+CATALOG_MAX_PAGE_SIZE = 500
+
+# Order history pagination
+
+ORDER_PAGE_SIZE = 50
+
+ORDER_MAX_PAGE_SIZE = 500
+
+# A running import job that has not reported progress for this many seconds is
+# considered abandoned by a crashed worker and is claimed again.
+
+IMPORT_JOB_STALE_AFTER = 10 * 60
+
+# Responses to requests sent with an Idempotency-Key header are replayed for
+# retries with the same key during this many seconds (see the
+# purge_idempotency_keys command).
+
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# A request holds its Idempotency-Key for this many seconds while it runs; a
+# retry after that takes the key over, so a crashed request does not block it
+# until the key expires. Keep it above the server's request timeout (e.g.
+# gunicorn --timeout), so a request that is still running is never taken over.
+
+IDEMPOTENCY_LOCK_TTL = 5 * 60
+
+# Stock reserved at checkout is held for this many seconds; shops that have not
+# confirmed their part of the order by then lose it (see the
+# release_reservations command).
+
+RESERVATION_TTL = 30 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
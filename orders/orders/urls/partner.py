@@ -1,11 +1,34 @@
 from django.urls import path
 
-from autosales.views import PartnerUpdate, PartnerState, PartnerOrders
-
+from autosales.views import (
+    PartnerUpdate,
+    PartnerUpdateStatus,
+    PartnerState,
+    PartnerOrders,
+    PartnerOrderState,
+    PartnerOrderExport,
+    PartnerStats,
+)
 
 app_name = "autosales"
 urlpatterns = [
     path("partner/update", PartnerUpdate.as_view(), name="partner-update"),
+    path(
+        "partner/update/<int:job_id>",
+        PartnerUpdateStatus.as_view(),
+        name="partner-update-status",
+    ),
     path("partner/state", PartnerState.as_view(), name="partner-state"),
     path("partner/orders", PartnerOrders.as_view(), name="partner-orders"),
+    path(
+        "partner/orders/state",
+        PartnerOrderState.as_view(),
+        name="partner-orders-state",
+    ),
+    path(
+        "partner/orders/export",
+        PartnerOrderExport.as_view(),
+        name="partner-orders-export",
+    ),
+    path("partner/stats", PartnerStats.as_view(), name="partner-stats"),
 ]
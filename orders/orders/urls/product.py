@@ -1,9 +1,10 @@
 from django.urls import path
 
-from autosales.views import ProductInfoView, BasketView
+from autosales.views import ProductInfoView, CatalogCacheStats, BasketView
 
 app_name = "autosales"
 urlpatterns = [
     path("products", ProductInfoView.as_view(), name="shops"),
+    path("products/cache", CatalogCacheStats.as_view(), name="products-cache"),
     path("basket", BasketView.as_view(), name="basket"),
 ]